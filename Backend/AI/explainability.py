@@ -3,17 +3,83 @@ Explainability module for AI models using SHAP and LIME
 Provides interpretable explanations for model predictions
 """
 
+import os
+import importlib.util
 import numpy as np
-import pandas as pd
-import shap
-import lime
-import lime.lime_tabular
+import joblib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Tuple, Optional
 import logging
 import json
 
+from .model_manager import FAILURE_CLASSES, N_FEATURES
+from utils.timestamps import utc_now_iso
+
 logger = logging.getLogger(__name__)
 
+# On-disk cache for explainer background data and fitted SHAP explainers, so
+# repeated process starts skip regenerating and refitting them
+EXPLAIN_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'explain')
+memory = joblib.Memory(location=EXPLAIN_CACHE_DIR, verbose=0)
+
+# Number of perturbations LIME samples per explanation
+LIME_NUM_SAMPLES = 500
+
+# Number of single-sample SHAP/LIME explanations kept in memory
+EXPLANATION_CACHE_SIZE = 1024
+
+# Default seconds between the background explainer self-tests behind the health check
+HEALTH_PROBE_INTERVAL = 300
+
+def load_background_data(n_samples: int = 1000) -> np.ndarray:
+    """Generate explainer background data as a float32 feature matrix"""
+    from .pretrained_models import generate_synthetic_turbofan_data
+    
+    # Cache the generator itself, so the cache is invalidated when it changes
+    background_data, _, _, _ = memory.cache(generate_synthetic_turbofan_data)(n_samples)
+    return background_data
+
+@memory.cache
+def build_tree_explainer(model) -> 'shap.TreeExplainer':
+    """Build a tree-path-dependent TreeSHAP explainer, cached on disk by model content"""
+    import shap  # Imported on first use, it takes about a second to load
+    
+    return shap.TreeExplainer(model, feature_perturbation='tree_path_dependent')
+
+@memory.cache(ignore=['explainer'])
+def compute_global_importance(explainer: 'ModelExplainer', model_type: str, model: Any,
+                              n_samples: int, n_explained: int) -> List[Dict[str, Any]]:
+    """
+    Average SHAP importance over synthetic samples, cached on disk by model content
+    
+    The model is only passed so the cache key changes when it is retrained.
+    """
+    from .pretrained_models import generate_synthetic_turbofan_data
+    
+    sample_data, _, _, _ = generate_synthetic_turbofan_data(n_samples)
+    shap_explanations = explainer.get_shap_explanations(model_type, sample_data[:n_explained])
+    
+    # Collect each feature's importance across the samples it ranks in
+    importance_scores = {}
+    for shap_exp in shap_explanations:
+        for feature_info in shap_exp.get('feature_importance', []):
+            importance_scores.setdefault(feature_info['feature'], []).append(feature_info['abs_importance'])
+    
+    global_importance = [
+        {
+            'feature': feature,
+            'importance': np.mean(scores),
+            'std_dev': np.std(scores),
+            'samples': len(scores)
+        }
+        for feature, scores in importance_scores.items()
+    ]
+    global_importance.sort(key=lambda x: x['importance'], reverse=True)
+    return global_importance
+
 class ModelExplainer:
     """Provides SHAP and LIME explanations for model predictions"""
     
@@ -21,8 +87,21 @@ class ModelExplainer:
         self.model_manager = model_manager
         self.shap_explainers = {}
         self.lime_explainers = {}
+        self.global_importance = {}
         self.feature_names = self._get_feature_names()
-        self._initialize_explainers()
+        
+        # Explainers are built on first use, not at startup
+        self._init_lock = threading.Lock()
+        self._shap_initialized = False
+        self._lime_initialized = False
+        
+        # Recent single-sample explanations, keyed by method and exact input
+        self._explanation_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Latest explainer self-test, refreshed by a background thread
+        self.health = {'explainers': None, 'last_ok': None, 'last_error': None}
+        self.health_interval = None
     
     def _get_feature_names(self) -> List[str]:
         """Get standardized feature names"""
@@ -38,59 +117,158 @@ class ModelExplainer:
         
         return features
     
-    def _initialize_explainers(self):
-        """Initialize SHAP and LIME explainers for all models"""
+    def _get_shap_explainer(self, model_type: str):
+        """Get the SHAP explainer for a model, initializing SHAP explainers on first use"""
+        if not self._shap_initialized:
+            with self._init_lock:
+                if not self._shap_initialized:
+                    self._init_shap_explainers()
+                    self._shap_initialized = True
+        
+        if model_type not in self.shap_explainers:
+            raise ValueError(f"SHAP explainer not available for {model_type}")
+        
+        return self.shap_explainers[model_type]
+    
+    def _get_lime_explainer(self):
+        """Get the tabular LIME explainer, initializing it on first use"""
+        if not self._lime_initialized:
+            with self._init_lock:
+                if not self._lime_initialized:
+                    self._init_lime_explainers()
+                    self._lime_initialized = True
+        
+        if 'tabular' not in self.lime_explainers:
+            raise ValueError("LIME explainer not available")
+        
+        return self.lime_explainers['tabular']
+    
+    def is_lime_available(self) -> bool:
+        """Check whether the LIME explainer is usable, without building it"""
+        if self._lime_initialized:
+            return 'tabular' in self.lime_explainers
+        return importlib.util.find_spec('lime') is not None
+    
+    def _cached_explanation(self, key: Tuple, compute) -> Dict[str, Any]:
+        """
+        Get an explanation from the LRU cache, computing and storing it on a miss
+        
+        Explanations that report an error are not cached. A shallow copy is
+        returned, so callers can add request metadata to it.
+        """
+        with self._cache_lock:
+            explanation = self._explanation_cache.get(key)
+            if explanation is not None:
+                self._explanation_cache.move_to_end(key)
+                return dict(explanation)
+        
+        explanation = compute()
+        if 'error' not in explanation:
+            with self._cache_lock:
+                self._explanation_cache[key] = explanation
+                if len(self._explanation_cache) > EXPLANATION_CACHE_SIZE:
+                    self._explanation_cache.popitem(last=False)
+        
+        return dict(explanation)
+    
+    def _run_health_probe(self):
+        """Self-test the explainers on a fixed input and record the outcome"""
         try:
-            # Generate background data for SHAP
-            from .pretrained_models import generate_synthetic_turbofan_data
-            background_data, _, _ = generate_synthetic_turbofan_data(1000)
-            
-            # Initialize SHAP explainers
-            self._init_shap_explainers(background_data)
-            
-            # Initialize LIME explainers
-            self._init_lime_explainers(background_data)
-            
-            logger.info("Explainers initialized successfully")
-            
+            # Bypass the explanation cache so SHAP really runs
+            self.get_shap_explanations('rul', np.zeros((1, N_FEATURES)), max_display=3)
+            self.health = {
+                'explainers': {
+                    'shap_available': True,
+                    'lime_available': self.is_lime_available(),
+                    'feature_count': len(self.feature_names)
+                },
+                'last_ok': time.time(),
+                'last_error': None
+            }
         except Exception as e:
-            logger.error(f"Failed to initialize explainers: {str(e)}")
+            logger.warning(f"Explainer health probe failed: {str(e)}")
+            self.health = {**self.health, 'last_error': str(e)}
     
-    def _init_shap_explainers(self, background_data: pd.DataFrame):
-        """Initialize SHAP explainers"""
+    def _health_probe_loop(self):
+        """Run the self-test every health_interval seconds for the life of the process"""
+        while True:
+            self._run_health_probe()
+            time.sleep(self.health_interval)
+    
+    def start_health_probe(self, interval: float = HEALTH_PROBE_INTERVAL):
+        """
+        Start the background self-test behind get_health
+        
+        Call this in the process that serves requests: threads do not survive
+        fork, and a process that forks workers should not run SHAP first.
+        """
+        if self.health_interval is not None:
+            return
+        self.health_interval = interval
+        threading.Thread(
+            target=self._health_probe_loop, name='explainer-health', daemon=True
+        ).start()
+    
+    def get_health(self) -> Dict[str, Any]:
+        """
+        Get the latest explainer self-test result without running SHAP in the caller
+        
+        Returns:
+            Dictionary with explainer status, the time of the last successful
+            self-test and the last error, if any; all None until the first
+            self-test finishes
+        """
+        return self.health
+    
+    def _init_shap_explainers(self):
+        """
+        Initialize SHAP explainers
+        
+        Both models are tree ensembles, so TreeSHAP in tree-path-dependent
+        mode is used; it reads cover statistics from the trees themselves
+        and needs no background sample.
+        """
         try:
-            # Scale background data for each model
-            if 'rul_scaler' in self.model_manager.scalers:
-                rul_background = self.model_manager.scalers['rul_scaler'].transform(background_data)
-                self.shap_explainers['rul'] = shap.Explainer(
-                    self.model_manager.models['rul_predictor'],
-                    rul_background[:100]  # Use subset for efficiency
+            if 'rul_predictor' in self.model_manager.models:
+                self.shap_explainers['rul'] = build_tree_explainer(
+                    self.model_manager.models['rul_predictor']
                 )
             
-            if 'failure_scaler' in self.model_manager.scalers:
-                failure_background = self.model_manager.scalers['failure_scaler'].transform(background_data)
-                self.shap_explainers['failure'] = shap.Explainer(
-                    self.model_manager.models['failure_classifier'],
-                    failure_background[:100]
+            if 'failure_classifier' in self.model_manager.models:
+                self.shap_explainers['failure'] = build_tree_explainer(
+                    self.model_manager.models['failure_classifier']
                 )
                 
         except Exception as e:
             logger.warning(f"SHAP explainer initialization failed: {str(e)}")
+            return
+        
+        logger.info("SHAP explainers initialized")
     
-    def _init_lime_explainers(self, background_data: pd.DataFrame):
+    def _init_lime_explainers(self):
         """Initialize LIME explainers"""
         try:
-            # LIME explainer for tabular data
-            self.lime_explainers['tabular'] = lime.lime_tabular.LimeTabularExplainer(
-                background_data.values,
+            from lime.lime_tabular import LimeTabularExplainer  # Imported on first use
+            
+            # Background data for LIME, materialized once as a float32 matrix
+            background_data = load_background_data(1000)
+            
+            # LIME explainer for tabular data - sensor readings are continuous,
+            # so perturbations are kept continuous instead of binned into quartiles
+            self.lime_explainers['tabular'] = LimeTabularExplainer(
+                background_data,
                 feature_names=self.feature_names,
-                class_names=['Low Risk', 'Medium Risk', 'High Risk'],
+                class_names=list(FAILURE_CLASSES),
                 mode='classification',
-                discretize_continuous=True
+                discretize_continuous=False,
+                feature_selection='none'
             )
             
         except Exception as e:
             logger.warning(f"LIME explainer initialization failed: {str(e)}")
+            return
+        
+        logger.info("LIME explainer initialized")
     
     def get_shap_explanation(self, 
                            model_type: str, 
@@ -108,107 +286,179 @@ class ModelExplainer:
             Dictionary with SHAP values and explanations
         """
         try:
-            if model_type not in self.shap_explainers:
-                raise ValueError(f"SHAP explainer not available for {model_type}")
-            
-            # Scale input data
-            scaler_key = f'{model_type}_scaler'
-            if scaler_key in self.model_manager.scalers:
-                scaled_data = self.model_manager.scalers[scaler_key].transform(
-                    input_data.reshape(1, -1)
-                )
-            else:
-                scaled_data = input_data.reshape(1, -1)
-            
-            # Get SHAP values
-            explainer = self.shap_explainers[model_type]
-            shap_values = explainer(scaled_data)
-            
-            # Process SHAP values
-            if hasattr(shap_values, 'values'):
-                values = shap_values.values[0]
-                base_value = shap_values.base_values[0] if hasattr(shap_values, 'base_values') else 0
-            else:
-                values = shap_values[0]
-                base_value = 0
-            
-            # Handle multi-class output
-            if len(values.shape) > 1:
-                values = values[:, 1]  # Use positive class for binary classification
+            input_row = np.asarray(input_data, dtype=np.float64).reshape(1, -1)
+            return self._cached_explanation(
+                ('shap', model_type, max_display, input_row.tobytes()),
+                lambda: self.get_shap_explanations(model_type, input_row, max_display)[0]
+            )
             
-            # Create feature importance ranking
-            feature_importance = []
-            for i, (feature, value) in enumerate(zip(self.feature_names, values)):
-                feature_importance.append({
-                    'feature': feature,
-                    'shap_value': float(value),
-                    'abs_importance': float(abs(value)),
-                    'impact': 'positive' if value > 0 else 'negative'
-                })
+        except Exception as e:
+            logger.error(f"SHAP explanation failed: {str(e)}")
+            return {
+                'error': str(e),
+                'model_type': model_type,
+                'explanation_type': 'SHAP'
+            }
+    
+    def get_shap_explanations(self,
+                            model_type: str,
+                            input_matrix: np.ndarray,
+                            max_display: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get SHAP explanations for a batch of predictions
+        
+        The whole matrix is scaled and explained in a single SHAP call,
+        then split into one explanation per row.
+        
+        Args:
+            model_type: 'rul' or 'failure'
+            input_matrix: Input features [N samples x 24 features]
+            max_display: Maximum number of features to display per sample
             
-            # Sort by absolute importance
-            feature_importance.sort(key=lambda x: x['abs_importance'], reverse=True)
+        Returns:
+            List of dictionaries with SHAP values and explanations, one per row
+        """
+        explainer = self._get_shap_explainer(model_type)
+        
+        # Scale input data
+        scaler_key = f'{model_type}_scaler'
+        if scaler_key in self.model_manager.scalers:
+            scaled_data = self.model_manager.scalers[scaler_key].transform(input_matrix)
+        else:
+            scaled_data = input_matrix
+        
+        # Get SHAP values for the whole batch
+        shap_values = explainer(scaled_data)
+        
+        values = np.asarray(shap_values.values)
+        base_values = np.asarray(shap_values.base_values)
+        
+        # Handle multi-class output
+        if values.ndim > 2:
+            values = values[:, :, 1]  # Use positive class for binary classification
+            if base_values.ndim > 1:
+                base_values = base_values[:, 1]
+        
+        # Rank features by absolute importance for every row at once, keeping
+        # only the top features needed for the response and the summary
+        abs_values = np.abs(values)
+        order = np.argsort(-abs_values, axis=1, kind='stable')[:, :max(max_display, 5)]
+        
+        explanations = []
+        for row_values, row_abs, row_order, base_value in zip(values, abs_values, order, base_values):
+            feature_importance = [
+                {
+                    'feature': self.feature_names[i],
+                    'shap_value': float(row_values[i]),
+                    'abs_importance': float(row_abs[i]),
+                    'impact': 'positive' if row_values[i] > 0 else 'negative'
+                }
+                for i in row_order
+            ]
             
-            return {
+            explanations.append({
                 'model_type': model_type,
                 'base_value': float(base_value),
                 'feature_importance': feature_importance[:max_display],
                 'total_features': len(self.feature_names),
                 'explanation_type': 'SHAP',
                 'summary': self._generate_shap_summary(feature_importance[:5])
-            }
+            })
+        
+        return explanations
+    
+    def get_global_feature_importance(self,
+                                      model_type: str,
+                                      n_samples: int = 100,
+                                      n_explained: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get global feature importance for a model, sorted by importance
+        
+        The ranking only depends on the model, so it is computed once per
+        process and kept on disk across restarts.
+        
+        Args:
+            model_type: 'rul' or 'failure'
+            n_samples: Number of synthetic samples to generate
+            n_explained: Number of those samples to explain with SHAP
             
-        except Exception as e:
-            logger.error(f"SHAP explanation failed: {str(e)}")
-            return {
-                'error': str(e),
-                'model_type': model_type,
-                'explanation_type': 'SHAP'
-            }
+        Returns:
+            List of per-feature importance dictionaries
+        """
+        key = (model_type, n_samples, n_explained)
+        if key not in self.global_importance:
+            model_key = 'rul_predictor' if model_type == 'rul' else 'failure_classifier'
+            self.global_importance[key] = compute_global_importance(
+                self, model_type, self.model_manager.models.get(model_key), n_samples, n_explained
+            )
+        return self.global_importance[key]
     
     def get_lime_explanation(self, 
                            input_data: np.ndarray,
                            model_type: str = 'failure',
                            num_features: int = 10) -> Dict[str, Any]:
         """
-        Get LIME explanation for a prediction
+        Get LIME explanation for a prediction, reusing it for repeated inputs
+        
+        Args:
+            input_data: Input features [24 features]
+            model_type: Type of model to explain
+            num_features: Number of features to include in explanation
+            
+        Returns:
+            Dictionary with LIME explanations
+        """
+        input_data = np.asarray(input_data, dtype=np.float64)
+        return self._cached_explanation(
+            ('lime', model_type, num_features, input_data.tobytes()),
+            lambda: self._compute_lime_explanation(input_data, model_type, num_features)
+        )
+    
+    def _compute_lime_explanation(self,
+                                  input_data: np.ndarray,
+                                  model_type: str,
+                                  num_features: int) -> Dict[str, Any]:
+        """
+        Run LIME for a single prediction
         
         Args:
             input_data: Input features [24 features]
             model_type: Type of model to explain
             num_features: Number of features to include in explanation
             
+        Note:
+            With only 24 features, LIME is run on LIME_NUM_SAMPLES
+            perturbations (instead of 5000) and fits its local model on
+            every feature instead of running a feature-selection pass. This
+            trades a little stability of the local weights for roughly 10x
+            fewer model evaluations; the top num_features are then kept by
+            weight.
+            
         Returns:
             Dictionary with LIME explanations
         """
         try:
-            if 'tabular' not in self.lime_explainers:
-                raise ValueError("LIME explainer not available")
+            explainer = self._get_lime_explainer()
             
-            # Define prediction function for LIME
+            # Define prediction function for LIME - scores the whole
+            # perturbation matrix in one model call
             def predict_fn(X):
                 if model_type == 'rul':
-                    predictions = []
-                    for x in X:
-                        pred, _ = self.model_manager.predict_rul(x)
-                        # Convert to probability-like format for LIME
-                        prob = 1.0 / (1.0 + np.exp(-pred / 100))  # Sigmoid transformation
-                        predictions.append([1-prob, prob])
-                    return np.array(predictions)
+                    scaled = self.model_manager.scalers['rul_scaler'].transform(X)
+                    preds = self.model_manager.models['rul_predictor'].predict(scaled)
+                    # Convert to probability-like format for LIME
+                    probs = 1.0 / (1.0 + np.exp(-preds / 100))  # Sigmoid transformation
+                    return np.column_stack([1 - probs, probs])
                 else:  # failure classification
-                    predictions = []
-                    for x in X:
-                        risk_class, metadata = self.model_manager.predict_failure_risk(x)
-                        probs = list(metadata['probabilities'].values())
-                        predictions.append(probs)
-                    return np.array(predictions)
+                    scaled = self.model_manager.scalers['failure_scaler'].transform(X)
+                    return self.model_manager.models['failure_classifier'].predict_proba(scaled)
             
             # Get LIME explanation
-            explainer = self.lime_explainers['tabular']
             explanation = explainer.explain_instance(
                 input_data,
                 predict_fn,
-                num_features=num_features
+                num_features=num_features,
+                num_samples=LIME_NUM_SAMPLES
             )
             
             # Process LIME explanation
@@ -221,13 +471,14 @@ class ModelExplainer:
                     'impact': 'positive' if importance > 0 else 'negative'
                 })
             
-            # Sort by absolute importance
+            # Sort by absolute importance and keep the requested top features
             lime_features.sort(key=lambda x: x['abs_importance'], reverse=True)
+            lime_features = lime_features[:num_features]
             
             return {
                 'model_type': model_type,
                 'feature_importance': lime_features,
-                'local_prediction': explanation.predict_proba[1] if len(explanation.predict_proba) > 1 else explanation.predict_proba[0],
+                'local_prediction': float(explanation.predict_proba[1] if len(explanation.predict_proba) > 1 else explanation.predict_proba[0]),
                 'explanation_type': 'LIME',
                 'summary': self._generate_lime_summary(lime_features[:3])
             }
@@ -251,12 +502,16 @@ class ModelExplainer:
             Combined analysis results
         """
         try:
-            # Get SHAP explanations for both models
-            shap_rul = self.get_shap_explanation('rul', input_data)
-            shap_failure = self.get_shap_explanation('failure', input_data)
-            
-            # Get LIME explanation
-            lime_explanation = self.get_lime_explanation(input_data, 'failure')
+            # Run SHAP explanations for both models and the LIME explanation
+            # concurrently - the tree ensembles release the GIL while predicting
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                shap_rul_future = executor.submit(self.get_shap_explanation, 'rul', input_data)
+                shap_failure_future = executor.submit(self.get_shap_explanation, 'failure', input_data)
+                lime_future = executor.submit(self.get_lime_explanation, input_data, 'failure')
+                
+                shap_rul = shap_rul_future.result()
+                shap_failure = shap_failure_future.result()
+                lime_explanation = lime_future.result()
             
             # Combine and analyze
             combined_analysis = {
@@ -264,7 +519,7 @@ class ModelExplainer:
                 'shap_failure': shap_failure,
                 'lime_local': lime_explanation,
                 'consensus_features': self._find_consensus_features(shap_rul, shap_failure, lime_explanation),
-                'analysis_timestamp': pd.Timestamp.now().isoformat()
+                'analysis_timestamp': utc_now_iso()
             }
             
             return combined_analysis
@@ -304,14 +559,16 @@ class ModelExplainer:
         consensus = []
         
         try:
-            # Get top features from each method
-            shap_rul_features = {f['feature'] for f in shap_rul.get('feature_importance', [])[:5]}
-            shap_failure_features = {f['feature'] for f in shap_failure.get('feature_importance', [])[:5]}
-            lime_features = {f['feature'].split(' ')[0] for f in lime_exp.get('feature_importance', [])[:5]}  # LIME might have ranges
+            # Get top features from each method - LIME reports plain feature
+            # names since its perturbations are not discretized
+            def top_features(explanation: Dict, k: int = 5) -> np.ndarray:
+                return np.array([f['feature'] for f in explanation.get('feature_importance', [])[:k]])
             
             # Find intersection
-            all_features = [shap_rul_features, shap_failure_features, lime_features]
-            consensus = list(set.intersection(*all_features))
+            consensus = np.intersect1d(
+                np.intersect1d(top_features(shap_rul), top_features(shap_failure)),
+                top_features(lime_exp)
+            ).tolist()
             
         except Exception as e:
             logger.warning(f"Consensus analysis failed: {str(e)}")
@@ -6,21 +6,92 @@ Handles RUL prediction, failure classification, and anomaly detection
 import os
 import joblib
 import numpy as np
-import pandas as pd
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Callable
 import logging
-from datetime import datetime
+import threading
+
+from utils.timestamps import utc_now_iso
+
+# Number of model input features (21 sensors + 3 settings)
+N_FEATURES = 24
+
+# Failure risk class names, indexed by classifier output
+FAILURE_CLASSES = ('Low Risk', 'Medium Risk', 'High Risk')
+
+# Largest batch scored by ONNX Runtime for the RUL model; XGBoost's own
+# predictor is faster on larger batches
+ONNX_RUL_MAX_ROWS = 64
+
+# Directory written by save_models_to_disk (setup.py runs it from Backend/)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
 
 class ModelManager:
     """Manages all AI models for predictive maintenance"""
     
-    def __init__(self):
+    def __init__(self, models_dir: str = MODELS_DIR):
         self.logger = logging.getLogger(__name__)
+        self.models_dir = models_dir
         self.models = {}
         self.scalers = {}
+        self.boosters = {}
+        self.sessions = {}
         self.model_info = {}
+        self._scaler_params = {}
+        self._anomaly_params = None
+        self._local = threading.local()
         self._load_all_models()
     
+    def _as_row(self, sensor_data: np.ndarray) -> np.ndarray:
+        """
+        Copy a single sample into a reusable (1, 24) input buffer
+        
+        The buffer is per thread, so concurrent requests never share it.
+        """
+        row_buffer = getattr(self._local, 'row_buffer', None)
+        if row_buffer is None:
+            row_buffer = self._local.row_buffer = np.empty((1, N_FEATURES))
+        np.copyto(row_buffer, np.asarray(sensor_data).reshape(1, -1))
+        return row_buffer
+    
+    def _scale_row(self, scaler_key: str, sensor_data: np.ndarray) -> np.ndarray:
+        """
+        Standardize a single sample inside the reusable input buffer
+        
+        The sample is copied once into the buffer and scaled in place, so no
+        intermediate arrays are allocated per prediction.
+        """
+        row = self._as_row(sensor_data)
+        mean, scale = self._scaler_params[scaler_key]
+        np.subtract(row, mean, out=row)
+        np.divide(row, scale, out=row)
+        return row
+    
+    def _scale_anomaly_row(self, sensor_data: np.ndarray) -> np.ndarray:
+        """
+        Standardize a single sample for the anomaly detector in float32
+        
+        The Isolation Forest compares float32 features, so the sample is
+        scaled straight into a float32 buffer with precomputed mean and
+        inverse scale, skipping the float64 round trip.
+        """
+        row_buffer = getattr(self._local, 'anomaly_buffer', None)
+        if row_buffer is None:
+            row_buffer = self._local.anomaly_buffer = np.empty((1, N_FEATURES), dtype=np.float32)
+        mean, inv_scale = self._anomaly_params
+        np.subtract(np.asarray(sensor_data).reshape(1, -1), mean, out=row_buffer, casting='same_kind')
+        np.multiply(row_buffer, inv_scale, out=row_buffer)
+        return row_buffer
+    
+    def _scale(self, scaler_key: str, data: np.ndarray) -> np.ndarray:
+        """
+        Standardize data with a fitted scaler's mean and scale
+        
+        Equivalent to scaler.transform, but skips sklearn's per-call input
+        validation on the prediction hot path.
+        """
+        mean, scale = self._scaler_params[scaler_key]
+        return (data - mean) / scale
+    
     def _load_all_models(self):
         """Load all available models"""
         try:
@@ -33,25 +104,68 @@ class ModelManager:
             # Load Anomaly Detection Model
             self._load_anomaly_model()
             
+            # Cache scaler statistics for the fast scaling path
+            self._scaler_params = {
+                key: (scaler.mean_, scaler.scale_) for key, scaler in self.scalers.items()
+            }
+            if 'anomaly_scaler' in self.scalers:
+                scaler = self.scalers['anomaly_scaler']
+                self._anomaly_params = (
+                    scaler.mean_.astype(np.float32),
+                    (1.0 / scaler.scale_).astype(np.float32)
+                )
+            
             self.logger.info("All models loaded successfully")
             
         except Exception as e:
             self.logger.error(f"Error loading models: {str(e)}")
     
+    def _load_from_disk(self, model_file: str, scaler_file: str) -> Optional[Tuple[Any, Any]]:
+        """
+        Load a saved model and its scaler from the models directory
+        
+        Pickles are memory-mapped read-only, so worker processes share the
+        page cache instead of each holding a private copy.
+        
+        Returns:
+            Tuple of (model, scaler), or None when either file is missing
+        """
+        model_path = os.path.join(self.models_dir, model_file)
+        scaler_path = os.path.join(self.models_dir, scaler_file)
+        if not (os.path.exists(model_path) and os.path.exists(scaler_path)):
+            return None
+        
+        if model_file.endswith('.ubj'):
+            import xgboost as xgb
+            model = xgb.XGBRegressor()
+            model.load_model(model_path)
+        else:
+            model = joblib.load(model_path, mmap_mode='r')
+        
+        scaler = joblib.load(scaler_path, mmap_mode='r')
+        self.logger.info(f"Loaded {model_file} from {self.models_dir}")
+        return model, scaler
+    
     def _load_rul_model(self):
         """Load RUL prediction model (XGBoost)"""
         try:
-            from .pretrained_models import create_rul_model, create_rul_scaler
+            from .pretrained_models import create_rul_model, convert_rul_model_to_onnx
             
-            model, scaler = create_rul_model()
+            # Use saved models when available, train otherwise
+            loaded = self._load_from_disk('rul_xgboost_model.ubj', 'rul_scaler.pkl')
+            model, scaler = loaded if loaded is not None else create_rul_model()
             
             self.models['rul_predictor'] = model
+            self.boosters['rul_predictor'] = model.get_booster()
             self.scalers['rul_scaler'] = scaler
+            self._load_onnx_session(
+                'rul_predictor', 'rul_xgboost.onnx', model, loaded is not None, convert_rul_model_to_onnx
+            )
             self.model_info['rul_predictor'] = {
                 'type': 'XGBoost Regressor',
                 'purpose': 'Remaining Useful Life Prediction',
                 'features': 24,  # 21 sensors + 3 settings
-                'loaded_at': datetime.utcnow().isoformat(),
+                'loaded_at': utc_now_iso(),
                 'status': 'ready'
             }
             
@@ -67,18 +181,21 @@ class ModelManager:
     def _load_failure_model(self):
         """Load failure classification model (LightGBM)"""
         try:
-            from .pretrained_models import create_failure_model, create_failure_scaler
+            from .pretrained_models import create_failure_model
             
-            model, scaler = create_failure_model()
+            # Use saved models when available, train otherwise
+            loaded = self._load_from_disk('failure_lgb_model.pkl', 'failure_scaler.pkl')
+            model, scaler = loaded if loaded is not None else create_failure_model()
             
             self.models['failure_classifier'] = model
+            self.boosters['failure_classifier'] = model.booster_
             self.scalers['failure_scaler'] = scaler
             self.model_info['failure_classifier'] = {
                 'type': 'LightGBM Classifier',
                 'purpose': 'Failure Risk Classification',
-                'classes': ['Low Risk', 'Medium Risk', 'High Risk'],
+                'classes': list(FAILURE_CLASSES),
                 'features': 24,
-                'loaded_at': datetime.utcnow().isoformat(),
+                'loaded_at': utc_now_iso(),
                 'status': 'ready'
             }
             
@@ -94,17 +211,23 @@ class ModelManager:
     def _load_anomaly_model(self):
         """Load anomaly detection model (Isolation Forest)"""
         try:
-            from .pretrained_models import create_anomaly_model, create_anomaly_scaler
+            from .pretrained_models import create_anomaly_model, convert_anomaly_model_to_onnx
             
-            model, scaler = create_anomaly_model()
+            # Use saved models when available, train otherwise
+            loaded = self._load_from_disk('anomaly_isolation_forest.pkl', 'anomaly_scaler.pkl')
+            model, scaler = loaded if loaded is not None else create_anomaly_model()
             
             self.models['anomaly_detector'] = model
             self.scalers['anomaly_scaler'] = scaler
+            
+            self._load_onnx_session(
+                'anomaly_detector', 'anomaly_if.onnx', model, loaded is not None, convert_anomaly_model_to_onnx
+            )
             self.model_info['anomaly_detector'] = {
                 'type': 'Isolation Forest',
                 'purpose': 'Anomaly Detection',
                 'features': 24,
-                'loaded_at': datetime.utcnow().isoformat(),
+                'loaded_at': utc_now_iso(),
                 'status': 'ready'
             }
             
@@ -117,6 +240,69 @@ class ModelManager:
                 'error': str(e)
             }
     
+    def _load_onnx_session(self, model_key: str, onnx_file: str, model: Any,
+                           saved: bool, convert: Callable[[Any], Optional[bytes]]):
+        """
+        Score a model through ONNX Runtime when available, it walks the trees natively
+        
+        The saved graph is reused with saved models, otherwise the model is
+        converted. Any failure leaves the model on its native predictor.
+        """
+        try:
+            onnx_path = os.path.join(self.models_dir, onnx_file)
+            if saved and os.path.exists(onnx_path):
+                with open(onnx_path, 'rb') as f:
+                    onnx_model = f.read()
+            else:
+                onnx_model = convert(model)
+            if onnx_model is not None:
+                session = self._create_onnx_session(onnx_model)
+                if session is not None:
+                    self.sessions[model_key] = session
+        except Exception as e:
+            self.logger.warning(f"ONNX Runtime unavailable for {model_key}: {str(e)}")
+    
+    def _create_onnx_session(self, onnx_model: bytes):
+        """Create a CPU ONNX Runtime session, or None when onnxruntime is not installed"""
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            self.logger.info("onnxruntime not installed, using scikit-learn inference")
+            return None
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1  # Requests are small, avoid thread pool overhead
+        return ort.InferenceSession(onnx_model, options, providers=['CPUExecutionProvider'])
+    
+    def _anomaly_scores(self, scaled_data: np.ndarray) -> np.ndarray:
+        """Isolation Forest decision scores, from ONNX Runtime when available"""
+        session = self.sessions.get('anomaly_detector')
+        if session is None:
+            return self.models['anomaly_detector'].decision_function(scaled_data)
+        
+        return session.run(['scores'], {'X': scaled_data.astype(np.float32, copy=False)})[0].ravel()
+    
+    def _predict_rul_values(self, scaled_data: np.ndarray) -> np.ndarray:
+        """
+        RUL predictions from ONNX Runtime for small batches, otherwise straight
+        from the XGBoost booster, bypassing the sklearn wrapper
+        """
+        session = self.sessions.get('rul_predictor')
+        if session is not None and len(scaled_data) <= ONNX_RUL_MAX_ROWS:
+            return session.run(['variable'], {'X': scaled_data.astype(np.float32, copy=False)})[0].ravel()
+        
+        return self.boosters['rul_predictor'].inplace_predict(scaled_data)
+    
+    def _predict_failure_proba(self, scaled_data: np.ndarray) -> np.ndarray:
+        """Class probabilities straight from the LightGBM booster, bypassing the sklearn wrapper"""
+        probabilities = self.boosters['failure_classifier'].predict(scaled_data)
+        
+        # Binary objectives only return the positive-class probability
+        if probabilities.ndim == 1:
+            probabilities = np.column_stack([1.0 - probabilities, probabilities])
+        
+        return probabilities
+    
     def predict_rul(self, sensor_data: np.ndarray) -> Tuple[float, Dict[str, Any]]:
         """
         Predict Remaining Useful Life
@@ -132,10 +318,10 @@ class ModelManager:
                 raise ValueError("RUL model not available")
             
             # Preprocess data
-            scaled_data = self.scalers['rul_scaler'].transform(sensor_data.reshape(1, -1))
+            scaled_data = self._scale_row('rul_scaler', sensor_data)
             
             # Make prediction
-            rul_prediction = self.models['rul_predictor'].predict(scaled_data)[0]
+            rul_prediction = self._predict_rul_values(scaled_data)[0]
             
             # Determine risk level
             if rul_prediction < 30:
@@ -149,7 +335,7 @@ class ModelManager:
                 'model_type': 'XGBoost',
                 'prediction_confidence': min(0.95, max(0.6, 1.0 - abs(rul_prediction - 100) / 200)),
                 'risk_level': risk_level,
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': utc_now_iso()
             }
             
             return float(rul_prediction), metadata
@@ -173,22 +359,21 @@ class ModelManager:
                 raise ValueError("Failure classification model not available")
             
             # Preprocess data
-            scaled_data = self.scalers['failure_scaler'].transform(sensor_data.reshape(1, -1))
+            scaled_data = self._scale_row('failure_scaler', sensor_data)
             
-            # Make prediction
-            risk_prediction = self.models['failure_classifier'].predict(scaled_data)[0]
-            risk_probabilities = self.models['failure_classifier'].predict_proba(scaled_data)[0]
+            # Make prediction - derive the class from the probabilities
+            # rather than running the ensemble a second time
+            risk_probabilities = self._predict_failure_proba(scaled_data)[0]
+            risk_prediction = int(np.argmax(risk_probabilities))
             
-            classes = ['Low Risk', 'Medium Risk', 'High Risk']
-            risk_class = classes[risk_prediction]
+            risk_class = FAILURE_CLASSES[risk_prediction]
             
             metadata = {
                 'model_type': 'LightGBM',
-                'probabilities': {
-                    classes[i]: float(prob) for i, prob in enumerate(risk_probabilities)
-                },
-                'confidence': float(max(risk_probabilities)),
-                'timestamp': datetime.utcnow().isoformat()
+                'probabilities': risk_probabilities,
+                'classes': FAILURE_CLASSES,
+                'confidence': float(risk_probabilities[risk_prediction]),
+                'timestamp': utc_now_iso()
             }
             
             return risk_class, metadata
@@ -212,20 +397,19 @@ class ModelManager:
                 raise ValueError("Anomaly detection model not available")
             
             # Preprocess data
-            scaled_data = self.scalers['anomaly_scaler'].transform(sensor_data.reshape(1, -1))
+            scaled_data = self._scale_anomaly_row(sensor_data)
             
-            # Make prediction (-1 for anomaly, 1 for normal)
-            anomaly_prediction = self.models['anomaly_detector'].predict(scaled_data)[0]
-            anomaly_score = self.models['anomaly_detector'].decision_function(scaled_data)[0]
+            # Score once; negative scores are anomalies, matching IsolationForest.predict
+            anomaly_score = self._anomaly_scores(scaled_data)[0]
             
-            is_anomaly = bool(anomaly_prediction == -1)  # Convert numpy bool to Python bool
+            is_anomaly = bool(anomaly_score < 0)  # Convert numpy bool to Python bool
             
             metadata = {
                 'model_type': 'Isolation Forest',
                 'anomaly_score': float(anomaly_score),
                 'threshold': 0.0,
                 'confidence': float(abs(anomaly_score)),
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': utc_now_iso()
             }
             
             return is_anomaly, metadata
@@ -234,21 +418,162 @@ class ModelManager:
             self.logger.error(f"Anomaly detection failed: {str(e)}")
             raise
     
+    def predict_rul_batch(self, sensor_matrix: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Predict Remaining Useful Life for a batch of samples
+        
+        Args:
+            sensor_matrix: Matrix of sensor readings [N samples x 24 features]
+            
+        Returns:
+            Tuple of (rul_predictions, metadata) with per-row arrays in metadata
+        """
+        try:
+            if 'rul_predictor' not in self.models:
+                raise ValueError("RUL model not available")
+            
+            # Preprocess and predict the whole batch at once
+            scaled_data = self._scale('rul_scaler', sensor_matrix)
+            rul_predictions = self._predict_rul_values(scaled_data).astype(float)
+            
+            # Determine risk levels
+            risk_levels = np.where(
+                rul_predictions < 30, 'High',
+                np.where(rul_predictions < 100, 'Medium', 'Low')
+            )
+            
+            metadata = {
+                'model_type': 'XGBoost',
+                'prediction_confidence': np.clip(1.0 - np.abs(rul_predictions - 100) / 200, 0.6, 0.95),
+                'risk_level': risk_levels,
+                'timestamp': utc_now_iso()
+            }
+            
+            return rul_predictions, metadata
+            
+        except Exception as e:
+            self.logger.error(f"Batch RUL prediction failed: {str(e)}")
+            raise
+    
+    def predict_failure_risk_batch(self, sensor_matrix: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Predict failure risk classification for a batch of samples
+        
+        Args:
+            sensor_matrix: Matrix of sensor readings [N samples x 24 features]
+            
+        Returns:
+            Tuple of (risk_classes, metadata) with per-row arrays in metadata
+        """
+        try:
+            if 'failure_classifier' not in self.models:
+                raise ValueError("Failure classification model not available")
+            
+            # Preprocess and predict the whole batch at once
+            scaled_data = self._scale('failure_scaler', sensor_matrix)
+            risk_probabilities = self._predict_failure_proba(scaled_data)
+            
+            risk_classes = np.array(FAILURE_CLASSES)[np.argmax(risk_probabilities, axis=1)]
+            
+            metadata = {
+                'model_type': 'LightGBM',
+                'classes': FAILURE_CLASSES,
+                'probabilities': risk_probabilities,
+                'confidence': risk_probabilities.max(axis=1),
+                'timestamp': utc_now_iso()
+            }
+            
+            return risk_classes, metadata
+            
+        except Exception as e:
+            self.logger.error(f"Batch failure risk prediction failed: {str(e)}")
+            raise
+    
+    def detect_anomaly_batch(self, sensor_matrix: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Detect anomalies for a batch of samples
+        
+        Args:
+            sensor_matrix: Matrix of sensor readings [N samples x 24 features]
+            
+        Returns:
+            Tuple of (is_anomaly, metadata) with per-row arrays in metadata
+        """
+        try:
+            if 'anomaly_detector' not in self.models:
+                raise ValueError("Anomaly detection model not available")
+            
+            # Preprocess and score the whole batch at once
+            scaled_data = self._scale('anomaly_scaler', sensor_matrix)
+            anomaly_scores = self._anomaly_scores(scaled_data)
+            
+            # Negative scores are anomalies, matching IsolationForest.predict
+            is_anomaly = anomaly_scores < 0
+            
+            metadata = {
+                'model_type': 'Isolation Forest',
+                'anomaly_score': anomaly_scores,
+                'threshold': 0.0,
+                'confidence': np.abs(anomaly_scores),
+                'timestamp': utc_now_iso()
+            }
+            
+            return is_anomaly, metadata
+            
+        except Exception as e:
+            self.logger.error(f"Batch anomaly detection failed: {str(e)}")
+            raise
+    
+    @staticmethod
+    def as_sensor_array(sensor_data: Any) -> np.ndarray:
+        """
+        Convert request sensor_data to a float64 array of the 24 features
+        
+        The float64 dtype matches the scaling buffers, so no further cast or
+        copy happens before prediction.
+        """
+        data = np.asarray(sensor_data, dtype=np.float64)
+        if data.size != N_FEATURES:
+            raise ValueError(f"Expected {N_FEATURES} features, got {data.size}")
+        return data.reshape(N_FEATURES)
+    
+    @staticmethod
+    def probabilities_to_dict(probabilities: np.ndarray) -> Dict[str, float]:
+        """Map one row of failure class probabilities to {class name: probability}"""
+        return {FAILURE_CLASSES[i]: float(prob) for i, prob in enumerate(probabilities)}
+    
     def get_models_status(self) -> Dict[str, Any]:
         """Get status of all loaded models"""
         return {
             'models': self.model_info,
             'total_models': len(self.models),
             'healthy_models': len([m for m in self.model_info.values() if m.get('status') == 'ready']),
-            'last_check': datetime.utcnow().isoformat()
+            'last_check': utc_now_iso()
         }
     
     def validate_input_data(self, data: np.ndarray) -> bool:
         """Validate input data format"""
-        if data.shape[-1] != 24:
-            raise ValueError(f"Expected 24 features, got {data.shape[-1]}")
+        if data.shape[-1] != N_FEATURES:
+            raise ValueError(f"Expected {N_FEATURES} features, got {data.shape[-1]}")
         
-        if np.any(np.isnan(data)) or np.any(np.isinf(data)):
+        # Single pass over the data catches both NaN and +/-inf
+        if not np.isfinite(data).all():
             raise ValueError("Input data contains NaN or infinite values")
         
         return True
+
+def init_app(app) -> ModelManager:
+    """
+    Create the application's shared ModelManager
+    
+    Models are loaded once per application and stored in
+    app.extensions['model_manager'] for all blueprints to use.
+    """
+    if 'model_manager' not in app.extensions:
+        app.extensions['model_manager'] = ModelManager()
+    return app.extensions['model_manager']
+
+def get_model_manager() -> ModelManager:
+    """Get the current application's shared ModelManager"""
+    from flask import current_app
+    return current_app.extensions['model_manager']
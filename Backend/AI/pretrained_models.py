@@ -5,106 +5,250 @@ Creates and trains models using synthetic NASA Turbofan-like data
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.model_selection import train_test_split
-import xgboost as xgb
-import lightgbm as lgb
 import joblib
 import os
-from typing import Tuple, Any
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Tuple, Any, Optional, List, Callable
 import logging
 
 logger = logging.getLogger(__name__)
 
-def generate_synthetic_turbofan_data(n_samples: int = 10000) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+# Sensors (1-indexed) that carry a degradation trend
+DEGRADING_SENSORS = [2, 3, 4, 7, 11, 12, 15, 17, 20, 21]
+
+# Seed for all synthetic data generation
+RANDOM_SEED = 42
+
+def make_rng(seed: int = RANDOM_SEED) -> np.random.Generator:
+    """Create a fresh, seeded PCG64DXSM generator for reproducible synthetic data"""
+    return np.random.Generator(np.random.PCG64DXSM(seed))
+
+# Feature matrix column names, in column order
+FEATURE_COLUMNS = tuple([f'setting_{i}' for i in range(1, 4)] + [f'sensor_{i}' for i in range(1, 22)])
+
+@lru_cache(maxsize=1)
+def _has_cuda() -> bool:
+    """Check once, on first training, whether a CUDA device is available"""
+    try:
+        import cupy
+        return cupy.cuda.runtime.getDeviceCount() > 0
+    except Exception:
+        return False
+
+def generate_synthetic_turbofan_data(n_samples: int = 10000) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[str, ...]]:
     """
     Generate synthetic turbofan engine data similar to NASA dataset
     
+    Features are float32 so the scalers and tree learners downstream work
+    on 4-byte columns, which is the precision XGBoost and LightGBM bin at.
+    
     Returns:
-        Tuple of (features_df, rul_targets, failure_targets)
+        Tuple of (features, rul_targets, failure_targets, columns) where
+        features is an [n_samples x 24] matrix; use as_dataframe for a
+        labelled view
     """
-    np.random.seed(42)  # For reproducibility
-    
-    # Generate synthetic sensor data
-    data = {}
+    rng = make_rng()  # Fresh generator per call for reproducibility
     
     # Operational settings (3 settings)
-    data['setting_1'] = np.random.normal(0, 1, n_samples)
-    data['setting_2'] = np.random.normal(0, 1, n_samples)
-    data['setting_3'] = np.random.normal(0, 1, n_samples)
+    settings = rng.standard_normal((n_samples, 3), dtype=np.float32)
     
     # Sensor measurements (21 sensors)
-    for i in range(1, 22):
-        # Create correlated sensor data with some degradation patterns
-        base_signal = np.random.normal(0, 1, n_samples)
-        
-        # Add degradation trend for some sensors
-        if i in [2, 3, 4, 7, 11, 12, 15, 17, 20, 21]:
-            degradation = np.linspace(0, 2, n_samples) + np.random.normal(0, 0.1, n_samples)
-            base_signal += degradation
-        
-        # Add operational setting influence
-        base_signal += 0.3 * data['setting_1'] + 0.2 * data['setting_2']
-        
-        data[f'sensor_{i}'] = base_signal
+    sensors = rng.standard_normal((n_samples, 21), dtype=np.float32)
     
-    # Create DataFrame
-    df = pd.DataFrame(data)
+    # Add degradation trend for some sensors
+    degrading = np.array(DEGRADING_SENSORS) - 1
+    sensors[:, degrading] += (
+        np.linspace(0, 2, n_samples, dtype=np.float32)[:, None] +
+        0.1 * rng.standard_normal((n_samples, len(degrading)), dtype=np.float32)
+    )
+    
+    # Add operational setting influence
+    sensors += 0.3 * settings[:, 0:1] + 0.2 * settings[:, 1:2]
+    
+    # Feature matrix, settings first
+    X = np.hstack([settings, sensors])
     
     # Generate RUL targets (Remaining Useful Life)
     # Higher sensor values generally indicate more degradation, lower RUL
-    degradation_score = (
-        df['sensor_2'] + df['sensor_3'] + df['sensor_4'] + 
-        df['sensor_7'] + df['sensor_11'] + df['sensor_12'] +
-        df['sensor_15'] + df['sensor_17'] + df['sensor_20'] + df['sensor_21']
-    ) / 10
+    degradation_score = sensors[:, degrading].sum(axis=1, dtype=np.float32) * 0.1
     
     # Convert degradation to RUL (inverse relationship with noise)
     max_rul = 300
-    rul_targets = max_rul - (degradation_score * 50) + np.random.normal(0, 20, n_samples)
-    rul_targets = np.clip(rul_targets, 1, max_rul)  # Ensure positive RUL
+    rul_targets = np.clip(
+        max_rul - degradation_score * 50 + rng.standard_normal(n_samples, dtype=np.float32) * 20,
+        1, max_rul  # Ensure positive RUL
+    )
+    
+    # Generate failure risk targets based on RUL:
+    # below 50 high risk (2), 50-150 medium risk (1), 150 and above low risk (0)
+    failure_targets = (2 - np.digitize(rul_targets, [50.0, 150.0])).astype(np.int8)
+    
+    return X, rul_targets, failure_targets, FEATURE_COLUMNS
+
+def as_dataframe(X: np.ndarray, columns: Tuple[str, ...] = FEATURE_COLUMNS) -> pd.DataFrame:
+    """Wrap a generated feature matrix in a DataFrame with named columns"""
+    return pd.DataFrame(X, columns=list(columns))
+
+class _FastStandardScaler:
+    """
+    Minimal StandardScaler replacement for the training pipeline
     
-    # Generate failure risk targets based on RUL
-    failure_targets = np.zeros(n_samples)
-    failure_targets[rul_targets < 50] = 2  # High risk
-    failure_targets[(rul_targets >= 50) & (rul_targets < 150)] = 1  # Medium risk
-    failure_targets[rul_targets >= 150] = 0  # Low risk
+    Exposes the fitted mean_, var_ and scale_ attributes and the
+    fit/transform/fit_transform methods of sklearn's StandardScaler, so
+    pickled scalers remain drop-in for downstream users, but normalizes with
+    two in-place NumPy ops instead of going through sklearn's validation.
+    """
     
-    return df, rul_targets, failure_targets.astype(int)
+    def fit(self, X: np.ndarray) -> '_FastStandardScaler':
+        X = np.asarray(X)
+        # Accumulate statistics in float64 like sklearn does for float32 input
+        self.mean_ = X.mean(axis=0, dtype=np.float64)
+        self.var_ = X.var(axis=0, dtype=np.float64)
+        scale = np.sqrt(self.var_)
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0  # Constant columns
+        self.scale_ = scale
+        self.n_features_in_ = X.shape[1]
+        self.n_samples_seen_ = X.shape[0]
+        return self
+    
+    def transform(self, X: np.ndarray, copy: bool = True) -> np.ndarray:
+        X = np.asarray(X)
+        dtype = X.dtype if X.dtype in (np.float32, np.float64) else np.float64
+        X = np.array(X, dtype=dtype, copy=copy)
+        np.subtract(X, self.mean_.astype(dtype, copy=False), out=X)
+        np.divide(X, self.scale_.astype(dtype, copy=False), out=X)
+        return X
+    
+    def fit_transform(self, X: np.ndarray, copy: bool = True) -> np.ndarray:
+        return self.fit(X).transform(X, copy=copy)
+
+# Number of synthetic samples shared by all training routines
+TRAINING_SAMPLES = 8000
+
+# Number of those samples used to fit the anomaly detector
+ANOMALY_TRAINING_SAMPLES = 6000
+
+@lru_cache(maxsize=1)
+def get_training_data() -> Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[str, ...]]:
+    """
+    Generate the synthetic training dataset once per process
+    
+    All create_*_model functions share this dataset instead of each
+    regenerating their own. Callers must not modify the returned objects.
+    
+    Returns:
+        Tuple of (features, rul_targets, failure_targets, columns)
+    """
+    return generate_synthetic_turbofan_data(TRAINING_SAMPLES)
+
+@lru_cache(maxsize=1)
+def get_train_test_indices() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Held-out split of the shared training dataset, used by every model
+    
+    Stratified by failure risk so the classifier sees each class in both
+    parts. Callers must not modify the returned arrays.
+    
+    Returns:
+        Tuple of (train_indices, test_indices)
+    """
+    from sklearn.model_selection import train_test_split
+    
+    _, _, y_failure, _ = get_training_data()
+    return tuple(train_test_split(
+        np.arange(len(y_failure)), test_size=0.2, random_state=42, stratify=y_failure
+    ))
+
+@lru_cache(maxsize=1)
+def get_scaled_training_data() -> Tuple[np.ndarray, '_FastStandardScaler']:
+    """
+    Standardize the shared training features once for all three models
+    
+    The tree models are insensitive to per-feature affine scaling, so one
+    scaler serves every model. It is fitted on the training rows of
+    get_train_test_indices only, so the test rows stay held out.
+    
+    Returns:
+        Tuple of (scaled_features, scaler)
+    """
+    X, _, _, _ = get_training_data()
+    train_idx, _ = get_train_test_indices()
+    scaler = _FastStandardScaler().fit(X[train_idx])
+    return scaler.transform(X), scaler
 
-def create_rul_model() -> Tuple[Any, Any]:
+def create_rul_model(X: Optional[np.ndarray] = None,
+                     y_rul: Optional[np.ndarray] = None,
+                     n_jobs: int = -1,
+                     scaler: Optional[_FastStandardScaler] = None,
+                     split: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Any, Any]:
     """
     Create and train RUL prediction model (XGBoost)
     
+    Args:
+        X: Training features, defaults to the shared scaled synthetic dataset
+        y_rul: RUL targets matching X
+        n_jobs: Number of training threads, -1 for all CPUs
+        scaler: Scaler X was already standardized with; when None a new
+            scaler is fitted on the training split
+        split: (train_indices, test_indices) into X; defaults to the shared
+            split for the shared dataset and a random split otherwise
+    
     Returns:
         Tuple of (trained_model, scaler)
     """
+    # Training libraries are imported on use so the data generator stays light
+    import xgboost as xgb
+    from sklearn.model_selection import train_test_split
+    
     logger.info("Creating RUL prediction model...")
     
-    # Generate training data
-    X, y_rul, _ = generate_synthetic_turbofan_data(8000)
+    # Use shared training data unless given
+    if X is None:
+        _, y_rul, _, _ = get_training_data()
+        X, scaler = get_scaled_training_data()
+        split = get_train_test_indices()
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y_rul, test_size=0.2, random_state=42
-    )
-    
-    # Scale features - convert to numpy arrays to avoid feature name warnings
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train.values)  # Use .values to get numpy array
-    X_test_scaled = scaler.transform(X_test.values)
-    
-    # Train XGBoost model
-    model = xgb.XGBRegressor(
+    if split is not None:
+        train_idx, test_idx = split
+        X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y_rul[train_idx], y_rul[test_idx]
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y_rul, test_size=0.2, random_state=42
+        )
+    
+    # Scale features unless already scaled
+    if scaler is None:
+        scaler = _FastStandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train, copy=False)  # Split already copied
+        X_test_scaled = scaler.transform(X_test)
+    else:
+        X_train_scaled, X_test_scaled = X_train, X_test
+    
+    # Train XGBoost model, on the GPU when one is available
+    params = dict(
         n_estimators=100,
         max_depth=6,
         learning_rate=0.1,
-        random_state=42,
-        n_jobs=-1
+        random_state=42
     )
-    
-    model.fit(X_train_scaled, y_train)
+    model = None
+    if _has_cuda():
+        try:
+            model = xgb.XGBRegressor(device='cuda', **params)
+            model.fit(X_train_scaled, y_train)
+            # Serve single-row predictions from host memory
+            model.set_params(device='cpu')
+        except xgb.core.XGBoostError as e:
+            # Package built without CUDA support
+            logger.warning(f"XGBoost CUDA training unavailable, using CPU: {str(e)}")
+            model = None
+    if model is None:
+        model = xgb.XGBRegressor(n_jobs=n_jobs, **params)
+        model.fit(X_train_scaled, y_train)
     
     # Evaluate model
     train_score = model.score(X_train_scaled, y_train)
@@ -114,39 +258,75 @@ def create_rul_model() -> Tuple[Any, Any]:
     
     return model, scaler
 
-def create_failure_model() -> Tuple[Any, Any]:
+def create_failure_model(X: Optional[np.ndarray] = None,
+                         y_failure: Optional[np.ndarray] = None,
+                         n_jobs: int = -1,
+                         scaler: Optional[_FastStandardScaler] = None,
+                         split: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Any, Any]:
     """
     Create and train failure classification model (LightGBM)
     
+    Args:
+        X: Training features, defaults to the shared scaled synthetic dataset
+        y_failure: Failure risk targets matching X
+        n_jobs: Number of training threads, -1 for all CPUs
+        scaler: Scaler X was already standardized with; when None a new
+            scaler is fitted on the training split
+        split: (train_indices, test_indices) into X; defaults to the shared
+            split for the shared dataset and a random split otherwise
+    
     Returns:
         Tuple of (trained_model, scaler)
     """
+    import lightgbm as lgb
+    from sklearn.model_selection import train_test_split
+    
     logger.info("Creating failure classification model...")
     
-    # Generate training data
-    X, _, y_failure = generate_synthetic_turbofan_data(8000)
+    # Use shared training data unless given
+    if X is None:
+        _, _, y_failure, _ = get_training_data()
+        X, scaler = get_scaled_training_data()
+        split = get_train_test_indices()
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y_failure, test_size=0.2, random_state=42, stratify=y_failure
-    )
-    
-    # Scale features - convert to numpy arrays to avoid feature name warnings
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train.values)  # Use .values to get numpy array
-    X_test_scaled = scaler.transform(X_test.values)
-    
-    # Train LightGBM model
-    model = lgb.LGBMClassifier(
+    if split is not None:
+        train_idx, test_idx = split
+        X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y_failure[train_idx], y_failure[test_idx]
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y_failure, test_size=0.2, random_state=42, stratify=y_failure
+        )
+    
+    # Scale features unless already scaled
+    if scaler is None:
+        scaler = _FastStandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train, copy=False)  # Split already copied
+        X_test_scaled = scaler.transform(X_test)
+    else:
+        X_train_scaled, X_test_scaled = X_train, X_test
+    
+    # Train LightGBM model, on the GPU when one is available
+    params = dict(
         n_estimators=100,
         max_depth=6,
         learning_rate=0.1,
         random_state=42,
-        n_jobs=-1,
+        n_jobs=n_jobs,
         verbose=-1
     )
-    
-    model.fit(X_train_scaled, y_train)
+    model = None
+    if _has_cuda():
+        try:
+            model = lgb.LGBMClassifier(device='cuda', **params)
+            model.fit(X_train_scaled, y_train)
+        except lgb.basic.LightGBMError as e:
+            # Wheel built without CUDA support
+            logger.warning(f"LightGBM CUDA training unavailable, using CPU: {str(e)}")
+            model = None
+    if model is None:
+        model = lgb.LGBMClassifier(**params)
+        model.fit(X_train_scaled, y_train)
     
     # Evaluate model
     train_score = model.score(X_train_scaled, y_train)
@@ -156,35 +336,53 @@ def create_failure_model() -> Tuple[Any, Any]:
     
     return model, scaler
 
-def create_anomaly_model() -> Tuple[Any, Any]:
+def create_anomaly_model(X: Optional[np.ndarray] = None,
+                         n_jobs: int = -1,
+                         scaler: Optional[_FastStandardScaler] = None) -> Tuple[Any, Any]:
     """
     Create and train anomaly detection model (Isolation Forest)
     
+    Args:
+        X: Normal training features, defaults to a slice of the shared
+            scaled synthetic dataset
+        n_jobs: Number of training jobs, -1 for all CPUs
+        scaler: Scaler X was already standardized with; when None a new
+            scaler is fitted on the training rows
+    
     Returns:
         Tuple of (trained_model, scaler)
     """
+    from sklearn.ensemble import IsolationForest
+    
     logger.info("Creating anomaly detection model...")
     
-    # Generate normal training data (no anomalies for unsupervised learning)
-    X_normal, _, _ = generate_synthetic_turbofan_data(6000)
+    # Normal training data (no anomalies for unsupervised learning)
+    if X is None:
+        X, scaler = get_scaled_training_data()
+    X_normal = X[:ANOMALY_TRAINING_SAMPLES]
     
-    # Scale features - convert to numpy arrays to avoid feature name warnings
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X_normal.values)  # Use .values to get numpy array
+    # Scale features unless already scaled
+    if scaler is None:
+        scaler = _FastStandardScaler()
+        X_scaled = scaler.fit_transform(X_normal)
+    else:
+        X_scaled = X_normal
     
     # Train Isolation Forest
+    # Scoring cost is linear in tree count; 50 trees keep the detection rates
+    # on this 24-feature data
     model = IsolationForest(
-        n_estimators=100,
+        n_estimators=50,
         contamination=0.1,  # Expect 10% anomalies
         random_state=42,
-        n_jobs=-1
+        n_jobs=n_jobs
     )
     
     model.fit(X_scaled)
     
     # Test with some anomalous data
     X_test_normal = X_scaled[:100]
-    X_test_anomaly = X_scaled[:50] + np.random.normal(0, 3, (50, X_scaled.shape[1]))  # Add noise for anomalies
+    X_test_anomaly = X_scaled[:50] + 3 * make_rng().standard_normal((50, X_scaled.shape[1]), dtype=np.float32)  # Add noise for anomalies
     
     normal_predictions = model.predict(X_test_normal)
     anomaly_predictions = model.predict(X_test_anomaly)
@@ -196,26 +394,81 @@ def create_anomaly_model() -> Tuple[Any, Any]:
     
     return model, scaler
 
-def create_rul_scaler() -> Any:
-    """Create scaler for RUL model (for consistency)"""
-    X, _, _ = generate_synthetic_turbofan_data(1000)
-    scaler = StandardScaler()
-    scaler.fit(X)
-    return scaler
-
-def create_failure_scaler() -> Any:
-    """Create scaler for failure model (for consistency)"""
-    X, _, _ = generate_synthetic_turbofan_data(1000)
-    scaler = StandardScaler()
-    scaler.fit(X)
-    return scaler
-
-def create_anomaly_scaler() -> Any:
-    """Create scaler for anomaly model (for consistency)"""
-    X, _, _ = generate_synthetic_turbofan_data(1000)
-    scaler = StandardScaler()
-    scaler.fit(X)
-    return scaler
+def convert_anomaly_model_to_onnx(model: Any) -> Optional[bytes]:
+    """
+    Convert the Isolation Forest to a serialized ONNX model
+    
+    The ONNX graph takes float32 input of shape [N, 24] and returns 'label'
+    and 'scores' outputs, where scores match decision_function.
+    
+    Args:
+        model: Trained IsolationForest
+    
+    Returns:
+        Serialized ONNX model, or None when skl2onnx is not installed
+    """
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+    except ImportError:
+        logger.info("skl2onnx not installed, skipping ONNX conversion")
+        return None
+    
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[('X', FloatTensorType([None, model.n_features_in_]))],
+        target_opset={'': 17, 'ai.onnx.ml': 3}
+    )
+    return onnx_model.SerializeToString()
+
+def convert_rul_model_to_onnx(model: Any) -> Optional[bytes]:
+    """
+    Convert the XGBoost RUL model to a serialized ONNX model
+    
+    The ONNX graph takes float32 input of shape [N, 24] and returns the
+    predictions as its 'variable' output.
+    
+    Args:
+        model: Trained XGBRegressor
+    
+    Returns:
+        Serialized ONNX model, or None when onnxmltools is not installed
+    """
+    try:
+        from onnxmltools import convert_xgboost
+        from onnxmltools.convert.common.data_types import FloatTensorType
+    except ImportError:
+        logger.info("onnxmltools not installed, skipping ONNX conversion")
+        return None
+    
+    onnx_model = convert_xgboost(
+        model,
+        initial_types=[('X', FloatTensorType([None, model.n_features_in_]))],
+        target_opset=15
+    )
+    return onnx_model.SerializeToString()
+
+def _train_model(builder: Callable[..., Tuple[Any, Any]], cpus: List[int], matrix_path: str,
+                 targets: Tuple[np.ndarray, ...], scaler: _FastStandardScaler,
+                 **options) -> Tuple[Any, Any]:
+    """Train one model in a worker process pinned to its own CPU set"""
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    
+    # Map the shared scaled matrix read-only; the page cache backs one copy
+    X_scaled = np.load(matrix_path, mmap_mode='r')
+    return builder(X_scaled, *targets, n_jobs=len(cpus), scaler=scaler, **options)
+
+def _split_cpus(n_groups: int) -> List[List[int]]:
+    """Split the usable CPUs into disjoint groups, sharing all CPUs when there are too few"""
+    if hasattr(os, 'sched_getaffinity'):
+        available = sorted(os.sched_getaffinity(0))
+    else:
+        available = list(range(os.cpu_count() or 1))
+    
+    if len(available) < n_groups:
+        return [available] * n_groups
+    return [[int(cpu) for cpu in group] for group in np.array_split(available, n_groups)]
 
 def save_models_to_disk(models_dir: str = '../models'):
     """
@@ -226,23 +479,66 @@ def save_models_to_disk(models_dir: str = '../models'):
     """
     os.makedirs(models_dir, exist_ok=True)
     
-    # Create and save RUL model
-    rul_model, rul_scaler = create_rul_model()
-    joblib.dump(rul_model, os.path.join(models_dir, 'rul_xgboost_model.pkl'))
-    joblib.dump(rul_scaler, os.path.join(models_dir, 'rul_scaler.pkl'))
-    
-    # Create and save failure model
-    failure_model, failure_scaler = create_failure_model()
-    joblib.dump(failure_model, os.path.join(models_dir, 'failure_lgb_model.pkl'))
-    joblib.dump(failure_scaler, os.path.join(models_dir, 'failure_scaler.pkl'))
-    
-    # Create and save anomaly model
-    anomaly_model, anomaly_scaler = create_anomaly_model()
-    joblib.dump(anomaly_model, os.path.join(models_dir, 'anomaly_isolation_forest.pkl'))
-    joblib.dump(anomaly_scaler, os.path.join(models_dir, 'anomaly_scaler.pkl'))
+    # Generate and scale the training data once for all three models
+    _, y_rul, y_failure, _ = get_training_data()
+    X_scaled, scaler = get_scaled_training_data()
+    split = get_train_test_indices()
+    
+    # Train the three independent models concurrently, each on its own CPUs.
+    # Spawned workers avoid forking a parent whose OpenMP runtime is initialized.
+    rul_cpus, failure_cpus, anomaly_cpus = _split_cpus(3)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        matrix_path = os.path.join(tmp_dir, 'X_scaled.npy')
+        np.save(matrix_path, X_scaled)
+        
+        with ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context('spawn')) as executor:
+            rul_future = executor.submit(
+                _train_model, create_rul_model, rul_cpus, matrix_path, (y_rul,), scaler, split=split
+            )
+            failure_future = executor.submit(
+                _train_model, create_failure_model, failure_cpus, matrix_path, (y_failure,), scaler, split=split
+            )
+            anomaly_future = executor.submit(
+                _train_model, create_anomaly_model, anomaly_cpus, matrix_path, (), scaler
+            )
+            
+            rul_model, rul_scaler = rul_future.result()
+            failure_model, failure_scaler = failure_future.result()
+            anomaly_model, anomaly_scaler = anomaly_future.result()
+    
+    # Pickles are written uncompressed with protocol 5 so ModelManager can
+    # memory-map them; XGBoost uses its own UBJSON format instead of pickle
+    dump_options = dict(compress=0, protocol=5)
+    
+    # Save RUL model
+    rul_model.save_model(os.path.join(models_dir, 'rul_xgboost_model.ubj'))
+    joblib.dump(rul_scaler, os.path.join(models_dir, 'rul_scaler.pkl'), **dump_options)
+    
+    # Save failure model
+    joblib.dump(failure_model, os.path.join(models_dir, 'failure_lgb_model.pkl'), **dump_options)
+    joblib.dump(failure_scaler, os.path.join(models_dir, 'failure_scaler.pkl'), **dump_options)
+    
+    # Save anomaly model
+    joblib.dump(anomaly_model, os.path.join(models_dir, 'anomaly_isolation_forest.pkl'), **dump_options)
+    joblib.dump(anomaly_scaler, os.path.join(models_dir, 'anomaly_scaler.pkl'), **dump_options)
+    
+    # Save ONNX graphs for ONNX Runtime inference
+    onnx_models = {
+        'rul_xgboost.onnx': convert_rul_model_to_onnx(rul_model),
+        'anomaly_if.onnx': convert_anomaly_model_to_onnx(anomaly_model)
+    }
+    for filename, onnx_model in onnx_models.items():
+        if onnx_model is not None:
+            with open(os.path.join(models_dir, filename), 'wb') as f:
+                f.write(onnx_model)
     
     logger.info(f"All models saved to {models_dir}")
 
 if __name__ == "__main__":
-    # Create and save models when run directly
-    save_models_to_disk()
+    # Create and save models when run directly. Import through the AI package
+    # so pickled objects such as the scalers reference AI.pretrained_models
+    # rather than __main__.
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from AI.pretrained_models import save_models_to_disk as save_package_models
+    save_package_models()
@@ -3,18 +3,82 @@ Anomaly Detection API endpoints
 """
 
 from flask import Blueprint, request, jsonify
+from werkzeug.local import LocalProxy
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 import logging
+from typing import Any, Dict, List, Tuple
 
-from AI.model_manager import ModelManager
+from AI.model_manager import get_model_manager, N_FEATURES
+from utils.timestamps import utc_now_iso
 
 anomaly_bp = Blueprint('anomaly', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize model manager
-model_manager = ModelManager()
+# Application's shared model manager, created by create_app
+model_manager = LocalProxy(get_model_manager)
+
+# Fixed input for the health check probe
+_HEALTH_PROBE = np.zeros(N_FEATURES)
+
+# Severity bands on |anomaly_score|: (0, 0.5] low, (0.5, 1] medium, (1, 2] high, above critical
+_SEV_THRESH = np.array([0.5, 1.0, 2.0])
+_SEV_LABELS = np.array(['low', 'medium', 'high', 'critical'], dtype=object)
+
+def _severity(anomaly_scores: np.ndarray) -> np.ndarray:
+    """Map anomaly scores to severity labels"""
+    return _SEV_LABELS[np.searchsorted(_SEV_THRESH, np.abs(anomaly_scores))]
+
+def _score_data_points(data_points: List[Dict[str, Any]]) -> Tuple[Dict[int, str], Dict[int, Tuple[bool, float, float, str]]]:
+    """
+    Score a list of data points with a single batched anomaly detector call
+    
+    Args:
+        data_points: Dicts carrying a 'sensor_data' list of 24 values
+        
+    Returns:
+        Tuple of (errors, row_results) keyed by data point index, where
+        row_results holds (is_anomaly, anomaly_score, confidence, severity)
+    """
+    # Convert well-formed input in one shot; fall back to per-row checks so
+    # malformed rows are reported individually
+    errors = {}
+    try:
+        sensor_matrix = np.asarray([point['sensor_data'] for point in data_points], dtype=np.float64)
+        if sensor_matrix.ndim != 2 or sensor_matrix.shape[1] != N_FEATURES:
+            raise ValueError("Ragged input")
+        valid_index = np.arange(len(data_points))
+    except Exception:
+        valid_rows = []
+        valid_index = []
+        for i, point in enumerate(data_points):
+            try:
+                sensor_data = np.asarray(point['sensor_data'], dtype=np.float64)
+                if sensor_data.ndim != 1 or sensor_data.shape[0] != N_FEATURES:
+                    raise ValueError(f"Expected {N_FEATURES} features, got {sensor_data.size}")
+                valid_rows.append(sensor_data)
+                valid_index.append(i)
+            except Exception as e:
+                errors[i] = str(e)
+        sensor_matrix = np.vstack(valid_rows) if valid_rows else None
+        valid_index = np.asarray(valid_index, dtype=np.intp)
+    
+    # Detect anomalies for all valid rows in one call
+    row_results = {}
+    if sensor_matrix is not None and len(sensor_matrix):
+        finite = np.isfinite(sensor_matrix).all(axis=1)
+        for i in valid_index[~finite]:
+            errors[int(i)] = "Input data contains NaN or infinite values"
+        
+        if finite.any():
+            is_anomaly, metadata = model_manager.detect_anomaly_batch(sensor_matrix[finite])
+            scores = metadata['anomaly_score']
+            confidences = metadata['confidence']
+            severities = _severity(scores)
+            for j, i in enumerate(valid_index[finite]):
+                row_results[int(i)] = (bool(is_anomaly[j]), float(scores[j]), float(confidences[j]), severities[j])
+    
+    return errors, row_results
 
 @anomaly_bp.route('/detect', methods=['POST'])
 def detect_anomaly():
@@ -34,7 +98,7 @@ def detect_anomaly():
         if not data or 'sensor_data' not in data:
             return jsonify({'error': 'Missing sensor_data in request'}), 400
         
-        sensor_data = np.array(data['sensor_data'])
+        sensor_data = model_manager.as_sensor_array(data['sensor_data'])
         machine_id = data.get('machine_id', 'unknown')
         threshold = data.get('threshold', 0.5)
         
@@ -45,15 +109,7 @@ def detect_anomaly():
         is_anomaly, metadata = model_manager.detect_anomaly(sensor_data)
         
         # Determine severity based on anomaly score
-        anomaly_score = metadata['anomaly_score']
-        if abs(anomaly_score) > 2.0:
-            severity = 'critical'
-        elif abs(anomaly_score) > 1.0:
-            severity = 'high'
-        elif abs(anomaly_score) > 0.5:
-            severity = 'medium'
-        else:
-            severity = 'low'
+        severity = _severity(metadata['anomaly_score'])
         
         response = {
             'machine_id': machine_id,
@@ -107,55 +163,38 @@ def batch_detect_anomalies():
         data_points = data['data_points']
         threshold = data.get('threshold', 0.5)
         
+        errors, row_results = _score_data_points(data_points)
+        
         results = []
         anomaly_count = 0
         
-        for point in data_points:
-            try:
-                sensor_data = np.array(point['sensor_data'])
-                machine_id = point.get('machine_id', 'unknown')
-                timestamp = point.get('timestamp', datetime.utcnow().isoformat())
-                
-                # Validate input
-                model_manager.validate_input_data(sensor_data)
-                
-                # Detect anomaly
-                is_anomaly, metadata = model_manager.detect_anomaly(sensor_data)
-                
-                if is_anomaly:
-                    anomaly_count += 1
-                
-                # Determine severity
-                anomaly_score = metadata['anomaly_score']
-                if abs(anomaly_score) > 2.0:
-                    severity = 'critical'
-                elif abs(anomaly_score) > 1.0:
-                    severity = 'high'
-                elif abs(anomaly_score) > 0.5:
-                    severity = 'medium'
-                else:
-                    severity = 'low'
-                
-                result = {
+        for i, point in enumerate(data_points):
+            machine_id = point.get('machine_id', 'unknown')
+            timestamp = point.get('timestamp', utc_now_iso())
+            
+            if i in errors:
+                logger.warning(f"Anomaly detection failed for data point: {errors[i]}")
+                results.append({
                     'machine_id': machine_id,
                     'timestamp': timestamp,
-                    'is_anomaly': is_anomaly,
-                    'anomaly_score': metadata['anomaly_score'],
-                    'severity': severity,
-                    'confidence': metadata['confidence'],
-                    'status': 'success'
-                }
-                
-                results.append(result)
-                
-            except Exception as e:
-                logger.warning(f"Anomaly detection failed for data point: {str(e)}")
-                results.append({
-                    'machine_id': point.get('machine_id', 'unknown'),
-                    'timestamp': point.get('timestamp', datetime.utcnow().isoformat()),
-                    'error': str(e),
+                    'error': errors[i],
                     'status': 'error'
                 })
+                continue
+            
+            point_anomaly, anomaly_score, confidence, severity = row_results[i]
+            if point_anomaly:
+                anomaly_count += 1
+            
+            results.append({
+                'machine_id': machine_id,
+                'timestamp': timestamp,
+                'is_anomaly': point_anomaly,
+                'anomaly_score': anomaly_score,
+                'severity': severity,
+                'confidence': confidence,
+                'status': 'success'
+            })
         
         response = {
             'results': results,
@@ -166,7 +205,7 @@ def batch_detect_anomalies():
                 'successful_analyses': len([r for r in results if r['status'] == 'success'])
             },
             'threshold_used': threshold,
-            'analysis_timestamp': datetime.utcnow().isoformat(),
+            'analysis_timestamp': utc_now_iso(),
             'status': 'completed'
         }
         
@@ -206,59 +245,40 @@ def analyze_anomaly_trends():
         # Sort by timestamp
         time_series_data.sort(key=lambda x: x.get('timestamp', ''))
         
-        anomaly_timeline = []
-        machine_stats = {}
+        errors, row_results = _score_data_points(time_series_data)
+        for i in errors:
+            logger.warning(f"Trend analysis failed for data point: {errors[i]}")
         
-        for point in time_series_data:
-            try:
-                sensor_data = np.array(point['sensor_data'])
-                machine_id = point.get('machine_id', 'unknown')
-                timestamp = point.get('timestamp', datetime.utcnow().isoformat())
-                
-                # Validate input
-                model_manager.validate_input_data(sensor_data)
-                
-                # Detect anomaly
-                is_anomaly, metadata = model_manager.detect_anomaly(sensor_data)
-                
-                # Track per machine
-                if machine_id not in machine_stats:
-                    machine_stats[machine_id] = {
-                        'total_points': 0,
-                        'anomalies': 0,
-                        'avg_score': 0,
-                        'max_score': float('-inf'),
-                        'min_score': float('inf')
-                    }
-                
-                stats = machine_stats[machine_id]
-                stats['total_points'] += 1
-                if is_anomaly:
-                    stats['anomalies'] += 1
-                
-                score = metadata['anomaly_score']
-                stats['avg_score'] = (stats['avg_score'] * (stats['total_points'] - 1) + score) / stats['total_points']
-                stats['max_score'] = max(stats['max_score'], score)
-                stats['min_score'] = min(stats['min_score'], score)
-                
-                # Add to timeline
-                anomaly_timeline.append({
-                    'timestamp': timestamp,
-                    'machine_id': machine_id,
-                    'is_anomaly': is_anomaly,
-                    'anomaly_score': score,
-                    'severity': 'critical' if abs(score) > 2.0 else 
-                               'high' if abs(score) > 1.0 else 
-                               'medium' if abs(score) > 0.5 else 'low'
-                })
-                
-            except Exception as e:
-                logger.warning(f"Trend analysis failed for data point: {str(e)}")
+        anomaly_timeline = []
+        for i, point in enumerate(time_series_data):
+            if i not in row_results:
                 continue
+            is_anomaly, score, _, severity = row_results[i]
+            anomaly_timeline.append({
+                'timestamp': point.get('timestamp', utc_now_iso()),
+                'machine_id': point.get('machine_id', 'unknown'),
+                'is_anomaly': is_anomaly,
+                'anomaly_score': score,
+                'severity': severity
+            })
         
-        # Calculate anomaly rate per machine
-        for machine_id, stats in machine_stats.items():
-            stats['anomaly_rate'] = stats['anomalies'] / stats['total_points'] if stats['total_points'] > 0 else 0
+        # Per machine statistics in one grouped reduction
+        machine_stats = {}
+        if anomaly_timeline:
+            scored = pd.DataFrame({
+                'machine_id': [entry['machine_id'] for entry in anomaly_timeline],
+                'score': [entry['anomaly_score'] for entry in anomaly_timeline],
+                'is_anomaly': [entry['is_anomaly'] for entry in anomaly_timeline]
+            })
+            grouped = scored.groupby('machine_id', sort=False).agg(
+                total_points=('score', 'size'),
+                anomalies=('is_anomaly', 'sum'),
+                avg_score=('score', 'mean'),
+                max_score=('score', 'max'),
+                min_score=('score', 'min')
+            )
+            grouped['anomaly_rate'] = grouped['anomalies'] / grouped['total_points']
+            machine_stats = grouped.to_dict('index')
         
         # Find machines with highest anomaly rates
         high_risk_machines = sorted(
@@ -286,7 +306,7 @@ def analyze_anomaly_trends():
                 'overall_anomaly_rate': sum(stats['anomalies'] for stats in machine_stats.values()) / len(time_series_data) if time_series_data else 0
             },
             'analysis_window_hours': window_size,
-            'analysis_timestamp': datetime.utcnow().isoformat(),
+            'analysis_timestamp': utc_now_iso(),
             'status': 'completed'
         }
         
@@ -300,9 +320,8 @@ def analyze_anomaly_trends():
 def health_check():
     """Health check for anomaly detection service"""
     try:
-        # Test anomaly detection with sample data
-        test_data = np.random.normal(0, 1, 24)
-        is_anomaly, metadata = model_manager.detect_anomaly(test_data)
+        # Test anomaly detection with a fixed probe
+        is_anomaly, metadata = model_manager.detect_anomaly(_HEALTH_PROBE)
         
         return jsonify({
             'service': 'Anomaly Detection API',
@@ -312,7 +331,7 @@ def health_check():
                 'anomaly_detected': is_anomaly,
                 'confidence': metadata.get('confidence', 0)
             },
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         })
         
     except Exception as e:
@@ -320,5 +339,5 @@ def health_check():
             'service': 'Anomaly Detection API',
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         }), 500
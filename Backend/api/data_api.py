@@ -2,19 +2,102 @@
 Data API endpoints for managing sensor data and datasets
 """
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
-import io
+import warnings
+from typing import Optional, Tuple
 import os
+import threading
+from collections import OrderedDict
 
-from AI.pretrained_models import generate_synthetic_turbofan_data
+from AI.pretrained_models import generate_synthetic_turbofan_data, as_dataframe, FEATURE_COLUMNS
+from utils.timestamps import utc_now_iso
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
 
 data_bp = Blueprint('data', __name__)
 logger = logging.getLogger(__name__)
 
+# Model input columns every uploaded or preprocessed dataset must provide.
+# Kept as a list for DataFrame indexing; not modified by the endpoints.
+REQUIRED_COLUMNS = list(FEATURE_COLUMNS)
+
+def _read_csv(source, **kwargs) -> pd.DataFrame:
+    """Parse CSV data with the multithreaded PyArrow reader when it is installed"""
+    try:
+        return pd.read_csv(source, engine='pyarrow', **kwargs)
+    except ImportError:
+        return pd.read_csv(source, **kwargs)
+
+def _records(df: pd.DataFrame) -> list:
+    """Rows of df as dicts, built from per-column lists instead of to_dict('records')"""
+    columns = list(df.columns)
+    return [dict(zip(columns, row)) for row in zip(*(df[col].tolist() for col in columns))]
+
+def _column_stats(df: pd.DataFrame, columns: list) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    NaN-skipping mean, std (ddof=1), min and max of numeric columns
+    
+    Matches the per-column pandas reductions, with one NumPy pass per
+    statistic over all columns.
+    """
+    values = df[columns].to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns yield NaN as in pandas
+        return (
+            np.nanmean(values, axis=0),
+            np.nanstd(values, axis=0, ddof=1),
+            np.nanmin(values, axis=0),
+            np.nanmax(values, axis=0)
+        )
+
+# Latest line count per path as {path: ((mtime, size), count)}, so unchanged
+# files are not rescanned and a rewritten file replaces its old entry
+_line_counts = {}
+
+def _count_lines(path: str) -> int:
+    """Count lines in a file by scanning its bytes for newlines"""
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _line_counts.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    count = 0
+    chunk = b''
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            count += chunk.count(b'\n')
+    if chunk and not chunk.endswith(b'\n'):
+        count += 1  # Last line without a trailing newline
+    _line_counts[path] = (version, count)
+    return count
+
+if njit is not None:
+    # Serial, so it is safe to call from concurrent request threads
+    @njit(cache=True)
+    def _outlier_mask(X, lo, hi):
+        """Flag rows with any value outside [lo, hi] in a single pass over X"""
+        n, m = X.shape
+        out = np.zeros(n, np.bool_)
+        for i in range(n):
+            for j in range(m):
+                v = X[i, j]
+                if v < lo[j] or v > hi[j]:
+                    out[i] = True
+                    break
+        return out
+else:
+    def _outlier_mask(X, lo, hi):
+        """Flag rows with any value outside [lo, hi]"""
+        return ((X < lo) | (X > hi)).any(axis=1)
+
 @data_bp.route('/generate-sample', methods=['POST'])
 def generate_sample_data():
     """
@@ -28,7 +111,7 @@ def generate_sample_data():
     }
     """
     try:
-        data = request.get_json() if request.get_json() else {}
+        data = request.get_json(silent=True) or {}
         
         num_samples = data.get('num_samples', 1000)
         format_type = data.get('format', 'json')
@@ -42,42 +125,43 @@ def generate_sample_data():
             return jsonify({'error': 'Format must be "json" or "csv"'}), 400
         
         # Generate data
-        features_df, rul_targets, failure_targets = generate_synthetic_turbofan_data(num_samples)
+        features, rul_targets, failure_targets, columns = generate_synthetic_turbofan_data(num_samples)
+        features_df = as_dataframe(features, columns)
         
         if include_targets:
             features_df['rul'] = rul_targets
             features_df['failure_risk'] = failure_targets
         
         # Add metadata columns
-        features_df['machine_id'] = [f'MACHINE-{str(i+1).zfill(3)}' for i in range(num_samples)]
-        features_df['timestamp'] = pd.date_range(
+        features_df['machine_id'] = [f'MACHINE-{i:03d}' for i in range(1, num_samples + 1)]
+        timestamps = pd.date_range(
             start=datetime.now() - timedelta(days=30),
             periods=num_samples,
-            freq='H'
+            freq=timedelta(hours=1)
         )
+        if format_type == 'json':
+            # ISO strings up front so the records carry no Timestamp objects
+            features_df['timestamp'] = np.datetime_as_string(timestamps.values.astype('datetime64[s]'))
+        else:
+            features_df['timestamp'] = timestamps
         
         if format_type == 'json':
             response_data = {
-                'data': features_df.to_dict('records'),
+                'data': _records(features_df),
                 'metadata': {
                     'num_samples': num_samples,
                     'features': list(features_df.columns),
-                    'generated_at': datetime.utcnow().isoformat()
+                    'generated_at': utc_now_iso()
                 },
                 'status': 'success'
             }
             return jsonify(response_data)
         
         else:  # CSV format
-            output = io.StringIO()
-            features_df.to_csv(output, index=False)
-            output.seek(0)
-            
-            return send_file(
-                io.BytesIO(output.getvalue().encode()),
+            return Response(
+                features_df.to_csv(index=False).encode(),
                 mimetype='text/csv',
-                as_attachment=True,
-                download_name=f'turbofan_data_{num_samples}_samples.csv'
+                headers={'Content-Disposition': f'attachment; filename=turbofan_data_{num_samples}_samples.csv'}
             )
         
     except Exception as e:
@@ -103,19 +187,17 @@ def upload_data():
         if not file.filename.lower().endswith('.csv'):
             return jsonify({'error': 'Only CSV files are supported'}), 400
         
-        # Read CSV data
+        # Size the upload from its stream, then parse the CSV data in place
+        file.stream.seek(0, os.SEEK_END)
+        size_bytes = file.stream.tell()
+        file.stream.seek(0)
         try:
-            df = pd.read_csv(file)
+            df = _read_csv(file.stream)
         except Exception as e:
             return jsonify({'error': f'Failed to read CSV file: {str(e)}'}), 400
         
         # Validate data structure
-        required_columns = []
-        for i in range(1, 4):
-            required_columns.append(f'setting_{i}')
-        for i in range(1, 22):
-            required_columns.append(f'sensor_{i}')
-        
+        required_columns = REQUIRED_COLUMNS
         missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             return jsonify({
@@ -126,11 +208,7 @@ def upload_data():
         
         # Basic data validation
         numeric_columns = required_columns
-        non_numeric = []
-        
-        for col in numeric_columns:
-            if not pd.api.types.is_numeric_dtype(df[col]):
-                non_numeric.append(col)
+        non_numeric = df[numeric_columns].select_dtypes(exclude=['number', 'bool']).columns.tolist()
         
         if non_numeric:
             return jsonify({
@@ -139,35 +217,38 @@ def upload_data():
         
         # Check for missing values
         missing_data = df[numeric_columns].isnull().sum()
-        missing_info = {col: int(count) for col, count in missing_data.items() if count > 0}
+        missing_info = missing_data[missing_data > 0].astype(int).to_dict()
         
         # Data quality metrics
         quality_metrics = {
             'total_rows': len(df),
             'total_columns': len(df.columns),
             'missing_values': missing_info,
-            'data_types': {col: str(df[col].dtype) for col in df.columns},
+            'data_types': df.dtypes.astype(str).to_dict(),
             'numeric_columns': len(numeric_columns),
             'valid_rows': len(df.dropna(subset=numeric_columns))
         }
         
-        # Sample statistics
-        statistics = {}
-        for col in numeric_columns:
-            statistics[col] = {
-                'mean': float(df[col].mean()),
-                'std': float(df[col].std()),
-                'min': float(df[col].min()),
-                'max': float(df[col].max()),
-                'missing_count': int(df[col].isnull().sum())
+        # Sample statistics, reduced over all numeric columns at once
+        means, stds, mins, maxs = _column_stats(df, numeric_columns)
+        
+        statistics = {
+            col: {
+                'mean': float(means[i]),
+                'std': float(stds[i]),
+                'min': float(mins[i]),
+                'max': float(maxs[i]),
+                'missing_count': int(missing_data[col])
             }
+            for i, col in enumerate(numeric_columns)
+        }
         
         response = {
             'upload_status': 'success',
             'file_info': {
                 'filename': file.filename,
-                'size_bytes': len(file.read()),
-                'upload_timestamp': datetime.utcnow().isoformat()
+                'size_bytes': size_bytes,
+                'upload_timestamp': utc_now_iso()
             },
             'data_quality': quality_metrics,
             'statistics': statistics,
@@ -210,7 +291,7 @@ def preprocess_data():
     }
     """
     try:
-        request_data = request.get_json()
+        request_data = request.get_json(silent=True)
         
         if not request_data or 'data' not in request_data:
             return jsonify({'error': 'Missing data in request'}), 400
@@ -222,12 +303,7 @@ def preprocess_data():
         df = pd.DataFrame(data)
         
         # Validate required columns
-        required_columns = []
-        for i in range(1, 4):
-            required_columns.append(f'setting_{i}')
-        for i in range(1, 22):
-            required_columns.append(f'sensor_{i}')
-        
+        required_columns = REQUIRED_COLUMNS
         missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             return jsonify({
@@ -239,53 +315,67 @@ def preprocess_data():
         
         # Handle missing values
         handle_missing = options.get('handle_missing', 'mean')
-        if df[required_columns].isnull().any().any():
-            if handle_missing == 'mean':
-                df[required_columns] = df[required_columns].fillna(df[required_columns].mean())
-                preprocessing_steps.append('Filled missing values with column means')
-            elif handle_missing == 'median':
-                df[required_columns] = df[required_columns].fillna(df[required_columns].median())
-                preprocessing_steps.append('Filled missing values with column medians')
+        values = df[required_columns].to_numpy(dtype=np.float64, copy=True)
+        missing = np.isnan(values)
+        if missing.any():
+            if handle_missing in ('mean', 'median'):
+                # Fill in place and write back only the columns that had gaps
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns stay NaN
+                    fill = np.nanmean(values, axis=0) if handle_missing == 'mean' else np.nanmedian(values, axis=0)
+                np.copyto(values, fill, where=missing)
+                gaps = missing.any(axis=0)
+                df[[col for col, gap in zip(required_columns, gaps) if gap]] = values[:, gaps]
+                preprocessing_steps.append(
+                    'Filled missing values with column means' if handle_missing == 'mean'
+                    else 'Filled missing values with column medians'
+                )
             elif handle_missing == 'drop':
-                df = df.dropna(subset=required_columns)
+                df = df[~missing.any(axis=1)]
                 preprocessing_steps.append('Dropped rows with missing values')
         
         # Remove outliers
         if options.get('remove_outliers', False):
             # Use IQR method
-            Q1 = df[required_columns].quantile(0.25)
-            Q3 = df[required_columns].quantile(0.75)
+            values = np.ascontiguousarray(df[required_columns].to_numpy(dtype=np.float64))
+            # Both quartiles from one partition per column; the NaN-aware
+            # variant works column by column, so only use it when needed
+            quantile = np.nanquantile if np.isnan(values).any() else np.quantile
+            Q1, Q3 = quantile(values, [0.25, 0.75], axis=0)
             IQR = Q3 - Q1
             
             # Define outliers
-            outlier_condition = (
-                (df[required_columns] < (Q1 - 1.5 * IQR)) | 
-                (df[required_columns] > (Q3 + 1.5 * IQR))
-            ).any(axis=1)
+            outlier_condition = _outlier_mask(values, Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
             
-            outliers_removed = outlier_condition.sum()
+            outliers_removed = int(outlier_condition.sum())
             df = df[~outlier_condition]
             preprocessing_steps.append(f'Removed {outliers_removed} outlier rows')
         
         # Normalize data
         if options.get('normalize', True):
-            from sklearn.preprocessing import StandardScaler
-            scaler = StandardScaler()
-            df[required_columns] = scaler.fit_transform(df[required_columns])
+            values = df[required_columns].to_numpy(dtype=np.float64)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns stay NaN
+                mean = np.nanmean(values, axis=0)
+                scale = np.sqrt(np.nanvar(values, axis=0))
+            scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0  # Constant columns, as in StandardScaler
+            df[required_columns] = (values - mean) / scale
             preprocessing_steps.append('Applied standard normalization (z-score)')
         
         # Calculate statistics
-        final_stats = {}
-        for col in required_columns:
-            final_stats[col] = {
-                'mean': float(df[col].mean()),
-                'std': float(df[col].std()),
-                'min': float(df[col].min()),
-                'max': float(df[col].max())
+        means, stds, mins, maxs = _column_stats(df, required_columns)
+        final_stats = {
+            col: {
+                'mean': float(means[i]),
+                'std': float(stds[i]),
+                'min': float(mins[i]),
+                'max': float(maxs[i])
             }
+            for i, col in enumerate(required_columns)
+        }
         
         response = {
-            'preprocessed_data': df.to_dict('records'),
+            'preprocessed_data': _records(df),
             'preprocessing_summary': {
                 'original_shape': original_shape,
                 'final_shape': df.shape,
@@ -294,7 +384,7 @@ def preprocess_data():
             },
             'statistics': final_stats,
             'status': 'success',
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         }
         
         return jsonify(response)
@@ -314,12 +404,13 @@ def validate_sensor_data():
     }
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or 'sensor_data' not in data:
             return jsonify({'error': 'Missing sensor_data in request'}), 400
         
-        sensor_data = np.array(data['sensor_data'])
+        # Float conversion maps JSON nulls to NaN so they are reported below
+        sensor_data = np.array(data['sensor_data'], dtype=np.float64)
         
         # Handle both single sample and batch
         if sensor_data.ndim == 1:
@@ -345,44 +436,46 @@ def validate_sensor_data():
                 f'Expected {expected_features} features, got {sensor_data.shape[1]}'
             )
         
-        # Check for invalid values
-        if np.any(np.isnan(sensor_data)):
-            validation_results['is_valid'] = False
-            validation_results['issues'].append('Data contains NaN values')
-        
-        if np.any(np.isinf(sensor_data)):
+        # Check for invalid values in one pass, then classify the few that fail
+        finite = np.isfinite(sensor_data)
+        if not finite.all():
+            non_finite = sensor_data[~finite]
             validation_results['is_valid'] = False
-            validation_results['issues'].append('Data contains infinite values')
+            if np.isnan(non_finite).any():
+                validation_results['issues'].append('Data contains NaN values')
+            if np.isinf(non_finite).any():
+                validation_results['issues'].append('Data contains infinite values')
         
         # Feature analysis
         if sensor_data.shape[1] == expected_features:
-            feature_names = []
-            for i in range(1, 4):
-                feature_names.append(f'setting_{i}')
-            for i in range(1, 22):
-                feature_names.append(f'sensor_{i}')
+            # Reduce each feature over contiguous rows of the transposed batch
+            features = np.ascontiguousarray(sensor_data.T)
+            means = features.mean(axis=1)
+            stds = features.std(axis=1)
+            mins = features.min(axis=1)
+            maxs = features.max(axis=1)
+            
+            validation_results['feature_analysis'] = {
+                feature_name: {
+                    'mean': float(means[i]),
+                    'std': float(stds[i]),
+                    'min': float(mins[i]),
+                    'max': float(maxs[i]),
+                    'range': float(maxs[i] - mins[i])
+                }
+                for i, feature_name in enumerate(FEATURE_COLUMNS)
+            }
             
-            for i, feature_name in enumerate(feature_names):
-                if i < sensor_data.shape[1]:
-                    feature_data = sensor_data[:, i]
-                    validation_results['feature_analysis'][feature_name] = {
-                        'mean': float(np.mean(feature_data)),
-                        'std': float(np.std(feature_data)),
-                        'min': float(np.min(feature_data)),
-                        'max': float(np.max(feature_data)),
-                        'range': float(np.max(feature_data) - np.min(feature_data))
-                    }
-                    
-                    # Check for suspicious values
-                    if np.std(feature_data) == 0:
-                        validation_results['issues'].append(
-                            f'{feature_name} has zero variance (constant values)'
-                        )
-                    
-                    if abs(np.mean(feature_data)) > 10:
-                        validation_results['recommendations'].append(
-                            f'{feature_name} may need normalization (mean: {np.mean(feature_data):.2f})'
-                        )
+            # Check for suspicious values
+            for i in np.flatnonzero(stds == 0):
+                validation_results['issues'].append(
+                    f'{FEATURE_COLUMNS[i]} has zero variance (constant values)'
+                )
+            
+            for i in np.flatnonzero(np.abs(means) > 10):
+                validation_results['recommendations'].append(
+                    f'{FEATURE_COLUMNS[i]} may need normalization (mean: {means[i]:.2f})'
+                )
         
         # Overall data quality score
         quality_score = 100
@@ -390,7 +483,7 @@ def validate_sensor_data():
             quality_score -= len(validation_results['issues']) * 20
         
         validation_results['quality_score'] = max(0, quality_score)
-        validation_results['timestamp'] = datetime.utcnow().isoformat()
+        validation_results['timestamp'] = utc_now_iso()
         validation_results['status'] = 'completed'
         
         return jsonify(validation_results)
@@ -399,6 +492,73 @@ def validate_sensor_data():
         logger.error(f"Data validation failed: {str(e)}")
         return jsonify({'error': 'Internal server error', 'status': 'error'}), 500
 
+# Fully parsed dataset files, as {path: (mtime_ns, frame)}; the least recently
+# used entry is dropped beyond DATASET_CACHE_SIZE and a rewritten file replaces
+# its old entry. Frames are shared, so callers must not modify them.
+DATASET_CACHE_SIZE = 4
+_dataset_frames = OrderedDict()
+_dataset_frames_lock = threading.Lock()
+
+def _load_dataset_frame(dataset_path: str, limit: Optional[int]) -> pd.DataFrame:
+    """
+    First limit rows of a dataset file (all rows if limit is None)
+    
+    A cached parse of the current file version is reused; otherwise a limited
+    request parses only the requested rows, and a full read is cached.
+    """
+    mtime_ns = os.stat(dataset_path).st_mtime_ns
+    with _dataset_frames_lock:
+        cached = _dataset_frames.get(dataset_path)
+        if cached is not None and cached[0] == mtime_ns:
+            _dataset_frames.move_to_end(dataset_path)
+            df = cached[1]
+            return df if limit is None else df.head(limit)
+    
+    if limit is not None:
+        # Parse only the requested rows instead of the whole file; the C
+        # engine (pyarrow has no nrows) rounds floats like the full read
+        return pd.read_csv(dataset_path, nrows=limit, memory_map=True,
+                           dtype={'timestamp': str}, float_precision='round_trip')
+    
+    # Keep timestamps as the strings stored in the file
+    df = _read_csv(dataset_path, dtype={'timestamp': str})
+    with _dataset_frames_lock:
+        _dataset_frames[dataset_path] = (mtime_ns, df)
+        _dataset_frames.move_to_end(dataset_path)
+        if len(_dataset_frames) > DATASET_CACHE_SIZE:
+            _dataset_frames.popitem(last=False)
+    return df
+
+def _dataset_response(dataset_name: str, dataset_path: str, limit: Optional[int]) -> dict:
+    """Load-dataset response for the first limit rows (all rows if limit is None)"""
+    df = _load_dataset_frame(dataset_path, limit)
+    
+    # Convert to records
+    records = _records(df)
+    
+    # Calculate statistics
+    stats = {
+        'total_records': len(df),
+        'unique_engines': len(df['engine_id'].unique()) if 'engine_id' in df.columns else 0,
+        'avg_rul': float(df['rul'].mean()) if 'rul' in df.columns else None,
+        'max_rul': float(df['rul'].max()) if 'rul' in df.columns else None,
+        'min_rul': float(df['rul'].min()) if 'rul' in df.columns else None,
+        'columns': list(df.columns),
+        'data_types': {col: str(df[col].dtype) for col in df.columns}
+    }
+    
+    return {
+        'dataset_name': dataset_name,
+        'records': records,
+        'statistics': stats,
+        'metadata': {
+            'loaded_at': utc_now_iso(),
+            'file_path': dataset_path,
+            'file_size_mb': round(os.path.getsize(dataset_path) / (1024*1024), 2)
+        },
+        'status': 'success'
+    }
+
 @data_bp.route('/load-dataset', methods=['POST'])
 def load_dataset():
     """
@@ -411,7 +571,7 @@ def load_dataset():
     }
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or 'dataset_name' not in data:
             return jsonify({'error': 'Missing dataset_name in request'}), 400
@@ -419,6 +579,12 @@ def load_dataset():
         dataset_name = data['dataset_name']
         limit = data.get('limit', None)
         
+        # Non-positive limits mean the whole dataset
+        if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int)):
+            return jsonify({'error': 'limit must be an integer', 'status': 'validation_error'}), 400
+        if limit is not None and limit <= 0:
+            limit = None
+        
         # Validate dataset name
         allowed_datasets = [
             'turbofan_data_small.csv',
@@ -460,38 +626,7 @@ def load_dataset():
         
         # Load dataset
         try:
-            df = pd.read_csv(dataset_path)
-            
-            if limit and limit > 0:
-                df = df.head(limit)
-            
-            # Convert to records
-            records = df.to_dict('records')
-            
-            # Calculate statistics
-            stats = {
-                'total_records': len(df),
-                'unique_engines': len(df['engine_id'].unique()) if 'engine_id' in df.columns else 0,
-                'avg_rul': float(df['rul'].mean()) if 'rul' in df.columns else None,
-                'max_rul': float(df['rul'].max()) if 'rul' in df.columns else None,
-                'min_rul': float(df['rul'].min()) if 'rul' in df.columns else None,
-                'columns': list(df.columns),
-                'data_types': {col: str(df[col].dtype) for col in df.columns}
-            }
-            
-            response = {
-                'dataset_name': dataset_name,
-                'records': records,
-                'statistics': stats,
-                'metadata': {
-                    'loaded_at': datetime.utcnow().isoformat(),
-                    'file_path': dataset_path,
-                    'file_size_mb': round(os.path.getsize(dataset_path) / (1024*1024), 2)
-                },
-                'status': 'success'
-            }
-            
-            return jsonify(response)
+            return jsonify(_dataset_response(dataset_name, dataset_path, limit))
             
         except Exception as e:
             return jsonify({
@@ -523,8 +658,7 @@ def list_datasets():
                 
                 # Try to get record count
                 try:
-                    df = pd.read_csv(file_path, nrows=1)
-                    total_rows = sum(1 for line in open(file_path)) - 1  # Subtract header
+                    total_rows = _count_lines(file_path) - 1  # Subtract header
                 except:
                     total_rows = 'unknown'
                 
@@ -533,14 +667,14 @@ def list_datasets():
                     'size_mb': round(file_size / (1024*1024), 2),
                     'size_bytes': file_size,
                     'estimated_records': total_rows,
-                    'modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
+                    'modified': datetime.fromtimestamp(os.path.getmtime(file_path), timezone.utc).isoformat(timespec='milliseconds')
                 })
         
         return jsonify({
             'datasets': datasets,
             'total_datasets': len(datasets),
             'datasets_directory': datasets_dir,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         })
         
     except Exception as e:
@@ -552,7 +686,7 @@ def health_check():
     """Health check for data service"""
     try:
         # Test data generation
-        test_df, _, _ = generate_synthetic_turbofan_data(10)
+        test_features, _, _, columns = generate_synthetic_turbofan_data(10)
         
         return jsonify({
             'service': 'Data API',
@@ -564,10 +698,10 @@ def health_check():
                 'sensor_data_validation'
             ],
             'test_generation': {
-                'samples_generated': len(test_df),
-                'features_generated': len(test_df.columns)
+                'samples_generated': len(test_features),
+                'features_generated': len(columns)
             },
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         })
         
     except Exception as e:
@@ -575,5 +709,5 @@ def health_check():
             'service': 'Data API',
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         }), 500
@@ -2,20 +2,79 @@
 Explainability API endpoints for SHAP and LIME explanations
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.local import LocalProxy
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
+import time
 
-from AI.model_manager import ModelManager
-from AI.explainability import ModelExplainer
+from AI.model_manager import get_model_manager
+from AI.explainability import ModelExplainer, HEALTH_PROBE_INTERVAL
+from utils.timestamps import utc_now_iso
 
 explainability_bp = Blueprint('explainability', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize model manager and explainer
-model_manager = ModelManager()
-explainer = ModelExplainer(model_manager)
+# Application's shared model manager and explainer
+model_manager = LocalProxy(get_model_manager)
+explainer = LocalProxy(lambda: current_app.extensions['model_explainer'])
+
+@explainability_bp.record_once
+def init_explainer(state):
+    """Create the explainer for the application's model manager on registration"""
+    state.app.extensions['model_explainer'] = ModelExplainer(state.app.extensions['model_manager'])
+    if state.app.config.get('EXPLAINER_HEALTH_PROBE_AT_INIT', True):
+        start_health_probe(state.app)
+
+def start_health_probe(app):
+    """Start the application's explainer self-test in the current process"""
+    app.extensions['model_explainer'].start_health_probe(
+        app.config.get('EXPLAINER_HEALTH_INTERVAL', HEALTH_PROBE_INTERVAL)
+    )
+
+# Response precisions for SHAP values, selected with ?precision=
+SHAP_PRECISIONS = ('float', 'bf16', 'int8')
+
+def _round_to_bf16(values: np.ndarray) -> np.ndarray:
+    """Round values to the nearest bfloat16 (8 mantissa bits), returned as float32"""
+    bits = np.asarray(values, dtype=np.float32).view(np.uint32)
+    # Round half to even on the 16 dropped bits, then clear them
+    bits = (bits + 0x7FFF + ((bits >> 16) & 1)) & 0xFFFF0000
+    return bits.astype(np.uint32).view(np.float32)
+
+def _quantize_shap_explanation(explanation: dict, precision: str) -> dict:
+    """
+    Return a copy of a SHAP explanation with its values at a lower precision
+    
+    bf16 rounds shap_value and abs_importance to bfloat16, which keeps about
+    three significant digits. int8 replaces them with integers in [-127, 127]
+    and adds a 'quantization' block holding the scale to multiply them by.
+    """
+    feature_importance = explanation.get('feature_importance', [])
+    values = np.array([f['shap_value'] for f in feature_importance], dtype=np.float32)
+    
+    if precision == 'bf16':
+        rounded = _round_to_bf16(values)
+        quantized = [
+            {**f, 'shap_value': value, 'abs_importance': abs(value)}
+            for f, value in zip(feature_importance, rounded.tolist())
+        ]
+        return {**explanation, 'feature_importance': quantized}
+    
+    # Symmetric per-explanation scale, so the largest value maps to +/-127
+    max_abs = float(np.abs(values).max()) if len(values) else 0.0
+    scale = max_abs / 127.0 if max_abs > 0 else 1.0
+    values_i8 = np.round(values / scale).astype(np.int8)
+    quantized = [
+        {**f, 'shap_value': value, 'abs_importance': abs(value)}
+        for f, value in zip(feature_importance, values_i8.tolist())
+    ]
+    return {
+        **explanation,
+        'feature_importance': quantized,
+        'quantization': {'dtype': 'int8', 'scale': scale}
+    }
 
 @explainability_bp.route('/shap', methods=['POST'])
 def get_shap_explanation():
@@ -29,14 +88,23 @@ def get_shap_explanation():
         "machine_id": "optional machine identifier",
         "max_features": 10
     }
+    
+    Query parameters:
+        precision: "float" (default), "bf16" or "int8" for the returned
+            shap_value/abs_importance values; int8 values are multiplied by
+            quantization.scale to recover the SHAP values
     """
     try:
+        precision = request.args.get('precision', 'float')
+        if precision not in SHAP_PRECISIONS:
+            return jsonify({'error': f'precision must be one of {", ".join(SHAP_PRECISIONS)}'}), 400
+        
         data = request.get_json()
         
         if not data or 'sensor_data' not in data:
             return jsonify({'error': 'Missing sensor_data in request'}), 400
         
-        sensor_data = np.array(data['sensor_data'])
+        sensor_data = model_manager.as_sensor_array(data['sensor_data'])
         model_type = data.get('model_type', 'rul')
         machine_id = data.get('machine_id', 'unknown')
         max_features = data.get('max_features', 10)
@@ -51,11 +119,13 @@ def get_shap_explanation():
         shap_explanation = explainer.get_shap_explanation(
             model_type, sensor_data, max_features
         )
+        if precision != 'float' and 'error' not in shap_explanation:
+            shap_explanation = _quantize_shap_explanation(shap_explanation, precision)
         
         # Add metadata
         shap_explanation.update({
             'machine_id': machine_id,
-            'request_timestamp': datetime.utcnow().isoformat(),
+            'request_timestamp': utc_now_iso(),
             'status': 'success'
         })
         
@@ -88,7 +158,7 @@ def get_lime_explanation():
         if not data or 'sensor_data' not in data:
             return jsonify({'error': 'Missing sensor_data in request'}), 400
         
-        sensor_data = np.array(data['sensor_data'])
+        sensor_data = model_manager.as_sensor_array(data['sensor_data'])
         model_type = data.get('model_type', 'failure')
         machine_id = data.get('machine_id', 'unknown')
         num_features = data.get('num_features', 10)
@@ -107,7 +177,7 @@ def get_lime_explanation():
         # Add metadata
         lime_explanation.update({
             'machine_id': machine_id,
-            'request_timestamp': datetime.utcnow().isoformat(),
+            'request_timestamp': utc_now_iso(),
             'status': 'success'
         })
         
@@ -138,7 +208,7 @@ def get_comprehensive_explanation():
         if not data or 'sensor_data' not in data:
             return jsonify({'error': 'Missing sensor_data in request'}), 400
         
-        sensor_data = np.array(data['sensor_data'])
+        sensor_data = model_manager.as_sensor_array(data['sensor_data'])
         machine_id = data.get('machine_id', 'unknown')
         
         # Validate input
@@ -150,7 +220,7 @@ def get_comprehensive_explanation():
         # Add metadata
         comprehensive_analysis.update({
             'machine_id': machine_id,
-            'request_timestamp': datetime.utcnow().isoformat(),
+            'request_timestamp': utc_now_iso(),
             'status': 'success'
         })
         
@@ -183,44 +253,16 @@ def get_feature_importance():
         if model_type not in ['rul', 'failure']:
             return jsonify({'error': 'model_type must be "rul" or "failure"'}), 400
         
-        # Generate sample data for global importance
-        from AI.pretrained_models import generate_synthetic_turbofan_data
-        sample_data, _, _ = generate_synthetic_turbofan_data(100)
-        
-        # Get feature importance for multiple samples
-        importance_scores = {}
-        feature_names = explainer.feature_names
-        
-        for _, row in sample_data.head(20).iterrows():  # Use 20 samples
-            shap_exp = explainer.get_shap_explanation(model_type, row.values)
-            
-            if 'feature_importance' in shap_exp:
-                for feature_info in shap_exp['feature_importance']:
-                    feature = feature_info['feature']
-                    if feature not in importance_scores:
-                        importance_scores[feature] = []
-                    importance_scores[feature].append(feature_info['abs_importance'])
-        
-        # Calculate average importance
-        global_importance = []
-        for feature, scores in importance_scores.items():
-            avg_importance = np.mean(scores)
-            global_importance.append({
-                'feature': feature,
-                'importance': float(avg_importance),
-                'std_dev': float(np.std(scores)),
-                'samples': len(scores)
-            })
-        
-        # Sort by importance
-        global_importance.sort(key=lambda x: x['importance'], reverse=True)
+        # Global importance only depends on the model, so it is cached
+        analysis_samples = 100
+        global_importance = explainer.get_global_feature_importance(model_type, analysis_samples)
         
         response = {
             'model_type': model_type,
             'global_feature_importance': global_importance[:top_n],
-            'total_features': len(feature_names),
-            'analysis_samples': len(sample_data),
-            'timestamp': datetime.utcnow().isoformat(),
+            'total_features': len(explainer.feature_names),
+            'analysis_samples': analysis_samples,
+            'timestamp': utc_now_iso(),
             'status': 'success'
         }
         
@@ -232,29 +274,35 @@ def get_feature_importance():
 
 @explainability_bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check for explainability service"""
-    try:
-        # Test if explainers are working
-        test_data = np.random.normal(0, 1, 24)
-        shap_test = explainer.get_shap_explanation('rul', test_data, max_display=3)
-        
-        explainer_status = {
-            'shap_available': 'error' not in shap_test,
-            'lime_available': 'tabular' in explainer.lime_explainers,
-            'feature_count': len(explainer.feature_names)
-        }
-        
+    """
+    Health check for explainability service
+    
+    Reports the explainers' background self-test instead of running SHAP per
+    request. The service is "starting" until the first self-test finishes and
+    turns unhealthy when no self-test has passed recently.
+    """
+    health = explainer.get_health()
+    last_ok = health['last_ok']
+    
+    if last_ok is None and health['last_error'] is None:
         return jsonify({
             'service': 'Explainability API',
-            'status': 'healthy',
-            'explainers': explainer_status,
-            'timestamp': datetime.utcnow().isoformat()
+            'status': 'starting',
+            'timestamp': utc_now_iso()
         })
-        
-    except Exception as e:
+    
+    if last_ok is None or time.time() - last_ok > 3 * explainer.health_interval:
         return jsonify({
             'service': 'Explainability API',
             'status': 'unhealthy',
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+            'error': health['last_error'] or 'Explainer self-test has not passed recently',
+            'timestamp': utc_now_iso()
+        }), 503
+    
+    return jsonify({
+        'service': 'Explainability API',
+        'status': 'healthy',
+        'explainers': health['explainers'],
+        'last_check': datetime.fromtimestamp(last_ok, timezone.utc).isoformat(timespec='milliseconds'),
+        'timestamp': utc_now_iso()
+    })
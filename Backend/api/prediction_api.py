@@ -3,18 +3,63 @@ Prediction API endpoints for RUL and failure risk predictions
 """
 
 from flask import Blueprint, request, jsonify
+from werkzeug.local import LocalProxy
 import numpy as np
 import pandas as pd
-from datetime import datetime
 import logging
+from typing import Any, Dict, List, Tuple
 
-from AI.model_manager import ModelManager
+from AI.model_manager import get_model_manager, N_FEATURES
+from utils.timestamps import utc_now_iso
 
 prediction_bp = Blueprint('prediction', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize model manager
-model_manager = ModelManager()
+# Application's shared model manager, created by create_app
+model_manager = LocalProxy(get_model_manager)
+
+def _stack_sensor_data(machines: List[Dict[str, Any]]) -> Tuple[Dict[int, str], np.ndarray, np.ndarray]:
+    """
+    Validate each machine's sensor_data and stack the valid rows into one matrix
+    
+    Args:
+        machines: Dicts carrying a 'sensor_data' list of 24 values
+        
+    Returns:
+        Tuple of (errors keyed by machine index, sensor matrix of the valid
+        machines, their machine indices)
+    """
+    errors = {}
+    try:
+        # Well-formed input converts in one shot
+        sensor_matrix = np.asarray([machine['sensor_data'] for machine in machines], dtype=np.float64)
+        if sensor_matrix.ndim != 2 or sensor_matrix.shape[1] != N_FEATURES:
+            raise ValueError("Ragged input")
+        valid_index = np.arange(len(machines))
+    except Exception:
+        # Fall back to per-machine checks so each bad row gets its own error
+        rows = []
+        valid_index = []
+        for i, machine in enumerate(machines):
+            if 'sensor_data' not in machine:
+                errors[i] = 'Missing sensor_data'
+                continue
+            try:
+                sensor_data = np.asarray(machine['sensor_data'], dtype=np.float64)
+                if sensor_data.size != N_FEATURES:
+                    raise ValueError(f"Expected {N_FEATURES} features, got {sensor_data.size}")
+                rows.append(sensor_data.reshape(N_FEATURES))
+                valid_index.append(i)
+            except Exception as e:
+                errors[i] = str(e)
+        sensor_matrix = np.vstack(rows) if rows else np.empty((0, N_FEATURES))
+        valid_index = np.asarray(valid_index, dtype=np.intp)
+    
+    finite = np.isfinite(sensor_matrix).all(axis=1)
+    for i in valid_index[~finite]:
+        errors[int(i)] = "Input data contains NaN or infinite values"
+    
+    return errors, sensor_matrix[finite], valid_index[finite]
 
 @prediction_bp.route('/rul', methods=['POST'])
 def predict_rul():
@@ -26,15 +71,24 @@ def predict_rul():
         "sensor_data": [24 sensor values],
         "machine_id": "optional machine identifier"
     }
+    
+    Alternatively, an application/octet-stream body of 24 little-endian
+    float32 values, with the machine identifier in an X-Machine-Id header.
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'sensor_data' not in data:
-            return jsonify({'error': 'Missing sensor_data in request'}), 400
-        
-        sensor_data = np.array(data['sensor_data'])
-        machine_id = data.get('machine_id', 'unknown')
+        if request.mimetype == 'application/octet-stream':
+            sensor_data = model_manager.as_sensor_array(
+                np.frombuffer(request.get_data(), dtype='<f4')
+            )
+            machine_id = request.headers.get('X-Machine-Id', 'unknown')
+        else:
+            data = request.get_json()
+            
+            if not data or 'sensor_data' not in data:
+                return jsonify({'error': 'Missing sensor_data in request'}), 400
+            
+            sensor_data = model_manager.as_sensor_array(data['sensor_data'])
+            machine_id = data.get('machine_id', 'unknown')
         
         # Validate input
         model_manager.validate_input_data(sensor_data)
@@ -82,7 +136,7 @@ def predict_failure_risk():
         if not data or 'sensor_data' not in data:
             return jsonify({'error': 'Missing sensor_data in request'}), 400
         
-        sensor_data = np.array(data['sensor_data'])
+        sensor_data = model_manager.as_sensor_array(data['sensor_data'])
         machine_id = data.get('machine_id', 'unknown')
         
         # Validate input
@@ -94,7 +148,7 @@ def predict_failure_risk():
         response = {
             'machine_id': machine_id,
             'risk_class': risk_class,
-            'probabilities': metadata['probabilities'],
+            'probabilities': model_manager.probabilities_to_dict(metadata['probabilities']),
             'confidence': metadata['confidence'],
             'model_info': {
                 'type': metadata['model_type'],
@@ -140,64 +194,67 @@ def batch_predict():
         machines = data['machines']
         prediction_types = data.get('prediction_types', ['rul', 'failure_risk'])
         
-        results = []
+        errors, sensor_matrix, valid_index = _stack_sensor_data(machines)
         
-        for machine in machines:
-            machine_id = machine.get('machine_id', 'unknown')
-            sensor_data = np.array(machine['sensor_data'])
-            
+        # Run each requested model once over all valid machines
+        valid_index = valid_index.tolist()
+        predictions = {i: {} for i in valid_index}
+        if valid_index:
             try:
-                # Validate input
-                model_manager.validate_input_data(sensor_data)
-                
-                machine_result = {
-                    'machine_id': machine_id,
-                    'predictions': {},
-                    'status': 'success'
-                }
-                
-                # RUL prediction
                 if 'rul' in prediction_types:
-                    rul_pred, rul_meta = model_manager.predict_rul(sensor_data)
-                    machine_result['predictions']['rul'] = {
-                        'value': rul_pred,
-                        'risk_level': rul_meta['risk_level'],
-                        'confidence': rul_meta['prediction_confidence']
-                    }
+                    rul_values, rul_meta = model_manager.predict_rul_batch(sensor_matrix)
+                    for j, i in enumerate(valid_index):
+                        predictions[i]['rul'] = {
+                            'value': float(rul_values[j]),
+                            'risk_level': str(rul_meta['risk_level'][j]),
+                            'confidence': float(rul_meta['prediction_confidence'][j])
+                        }
                 
-                # Failure risk prediction
                 if 'failure_risk' in prediction_types:
-                    risk_class, risk_meta = model_manager.predict_failure_risk(sensor_data)
-                    machine_result['predictions']['failure_risk'] = {
-                        'class': risk_class,
-                        'probabilities': risk_meta['probabilities'],
-                        'confidence': risk_meta['confidence']
-                    }
+                    risk_classes, risk_meta = model_manager.predict_failure_risk_batch(sensor_matrix)
+                    for j, i in enumerate(valid_index):
+                        predictions[i]['failure_risk'] = {
+                            'class': str(risk_classes[j]),
+                            'probabilities': model_manager.probabilities_to_dict(risk_meta['probabilities'][j]),
+                            'confidence': float(risk_meta['confidence'][j])
+                        }
                 
-                # Anomaly detection
                 if 'anomaly' in prediction_types:
-                    is_anomaly, anomaly_meta = model_manager.detect_anomaly(sensor_data)
-                    machine_result['predictions']['anomaly'] = {
-                        'is_anomaly': is_anomaly,
-                        'score': anomaly_meta['anomaly_score'],
-                        'confidence': anomaly_meta['confidence']
-                    }
-                
-                results.append(machine_result)
-                
+                    is_anomaly, anomaly_meta = model_manager.detect_anomaly_batch(sensor_matrix)
+                    for j, i in enumerate(valid_index):
+                        predictions[i]['anomaly'] = {
+                            'is_anomaly': bool(is_anomaly[j]),
+                            'score': float(anomaly_meta['anomaly_score'][j]),
+                            'confidence': float(anomaly_meta['confidence'][j])
+                        }
             except Exception as e:
-                logger.warning(f"Prediction failed for machine {machine_id}: {str(e)}")
+                for i in valid_index:
+                    errors[i] = str(e)
+        
+        results = []
+        for i, machine in enumerate(machines):
+            machine_id = machine.get('machine_id', 'unknown')
+            
+            if i in errors:
+                logger.warning(f"Prediction failed for machine {machine_id}: {errors[i]}")
                 results.append({
                     'machine_id': machine_id,
-                    'error': str(e),
+                    'error': errors[i],
                     'status': 'error'
                 })
+                continue
+            
+            results.append({
+                'machine_id': machine_id,
+                'predictions': predictions[i],
+                'status': 'success'
+            })
         
         response = {
             'results': results,
             'total_machines': len(machines),
             'successful_predictions': len([r for r in results if r['status'] == 'success']),
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': utc_now_iso(),
             'status': 'completed'
         }
         
@@ -217,7 +274,7 @@ def health_check():
             'service': 'Prediction API',
             'status': 'healthy',
             'models': models_status,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         })
         
     except Exception as e:
@@ -225,5 +282,5 @@ def health_check():
             'service': 'Prediction API',
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_now_iso()
         }), 500
@@ -5,10 +5,13 @@ Main Flask application serving AI models and explanations
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from flask_compress import Compress
+from prometheus_client import CollectorRegistry
+from prometheus_flask_exporter import PrometheusMetrics
+from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
 import os
 import sys
 import logging
-from datetime import datetime
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -19,18 +22,42 @@ from api.anomaly_api import anomaly_bp
 from api.data_api import data_bp
 from utils.config import Config
 from utils.logger import setup_logger
+from utils.json_provider import OrjsonProvider
+from utils.timestamps import utc_now_iso
+from AI.model_manager import init_app as init_model_manager
+
+API_VERSION = '2.1.0'
 
 def create_app():
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Serialize responses with orjson, including NumPy values
+    app.json = OrjsonProvider(app)
+    
     # Enable CORS for frontend communication
     CORS(app, origins=["http://localhost:8080", "http://localhost:3000"])
     
+    # Compress large JSON responses such as explanations and datasets
+    Compress(app)
+    
+    # Per-endpoint latency histograms, scraped at /metrics. Under gunicorn
+    # (gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR) each worker writes its
+    # samples there and /metrics aggregates all workers.
+    metrics_options = dict(group_by='endpoint', buckets=app.config['METRICS_LATENCY_BUCKETS'])
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        metrics = GunicornInternalPrometheusMetrics(app, **metrics_options)
+    else:
+        metrics = PrometheusMetrics(app, registry=CollectorRegistry(), **metrics_options)
+    metrics.info('pm_app_info', 'Predictive maintenance API', version=API_VERSION)
+    
     # Setup logging
     setup_logger(app)
     
+    # Load models once and share them across blueprints
+    init_model_manager(app)
+    
     # Register blueprints
     app.register_blueprint(prediction_bp, url_prefix='/api/v1/prediction')
     app.register_blueprint(explainability_bp, url_prefix='/api/v1/explainability')
@@ -43,8 +70,8 @@ def create_app():
         return jsonify({
             'status': 'healthy',
             'service': 'Predictive Maintenance API',
-            'version': '2.1.0',
-            'timestamp': datetime.now(datetime.timezone.utc).isoformat(),
+            'version': API_VERSION,
+            'timestamp': utc_now_iso(),
             'endpoints': {
                 'prediction': '/api/v1/prediction',
                 'explainability': '/api/v1/explainability', 
@@ -57,21 +84,19 @@ def create_app():
     def api_status():
         """API status with model information"""
         try:
-            from AI.model_manager import ModelManager
-            model_manager = ModelManager()
-            models_status = model_manager.get_models_status()
+            models_status = app.extensions['model_manager'].get_models_status()
             
             return jsonify({
                 'status': 'operational',
                 'models': models_status,
-                'timestamp': datetime.now(datetime.timezone.utc).isoformat()
+                'timestamp': utc_now_iso()
             })
         except Exception as e:
             app.logger.error(f"Status check failed: {str(e)}")
             return jsonify({
                 'status': 'error',
                 'message': str(e),
-                'timestamp': datetime.now(datetime.timezone.utc).isoformat()
+                'timestamp': utc_now_iso()
             }), 500
     
     @app.errorhandler(404)
@@ -85,6 +110,7 @@ def create_app():
     return app
 
 if __name__ == '__main__':
+    # Development server only; production runs under gunicorn.conf.py
     app = create_app()
     app.run(
         host='0.0.0.0',
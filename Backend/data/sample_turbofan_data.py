@@ -8,10 +8,48 @@ import numpy as np
 from datetime import datetime, timedelta
 import os
 
+# Per-sensor (base reading, degradation per cycle, noise std); a noise std of
+# NaN means the engine's own noise level is used
+SENSOR_PROFILES = np.array([
+    # Temperature sensors (affected by degradation)
+    [518.67, 0.0, 1.0],         # sensor_1: Fan inlet temperature
+    [642.35, 0.1, np.nan],      # sensor_2: LPC outlet temperature
+    [1589.70, 0.2, np.nan],     # sensor_3: HPC outlet temperature
+    [1400.60, 0.15, np.nan],    # sensor_4: LPT outlet temperature
+    # Pressure sensors
+    [14.62, 0.0, 0.1],          # sensor_5: Fan inlet pressure
+    [21.61, 0.01, np.nan],      # sensor_6: bypass-duct pressure
+    [553.85, 0.5, np.nan],      # sensor_7: HPC outlet pressure
+    # Flow and speed sensors
+    [2388.02, 0.0, 5.0],        # sensor_8: Physical fan speed
+    [9046.19, 0.0, 10.0],       # sensor_9: Physical core speed
+    [1.30, 0.0, 0.01],          # sensor_10: Engine pressure ratio
+    [47.47, 0.02, np.nan],      # sensor_11: Static pressure at HPC outlet
+    # Fuel and efficiency sensors
+    [521.66, 0.05, np.nan],     # sensor_12: Ratio of fuel flow to Ps30
+    [2388.02, 0.0, 5.0],        # sensor_13: Corrected fan speed
+    [8138.62, 0.0, 10.0],       # sensor_14: Corrected core speed
+    [8.4195, 0.001, np.nan],    # sensor_15: Bypass Ratio
+    # Additional operational sensors
+    [0.03, 0.0, 0.001],         # sensor_16: Burner fuel-air ratio
+    [392.0, 0.1, np.nan],       # sensor_17: Bleed Enthalpy
+    [2388.0, 0.0, 5.0],         # sensor_18: Required fan speed
+    [100.0, 0.0, 1.0],          # sensor_19: Required fan conversion speed
+    [38.86, 0.02, np.nan],      # sensor_20: High-pressure turbine coolant bleed
+    [23.419, 0.01, np.nan],     # sensor_21: Low-pressure turbine coolant bleed
+])
+
+FAILURE_MODES = ('normal', 'overheating', 'pressure_drop', 'speed_deviation')
+
 def create_sample_dataset(num_engines=10, cycles_per_engine=200):
     """
     Create a comprehensive sample dataset similar to NASA Turbofan data
     
+    Each engine's cycles are generated as a whole (cycles, sensors) block and
+    written into preallocated arrays, so no per-row Python objects are built. Every
+    engine draws from its own PCG64DXSM stream spawned from a fixed seed, so
+    the data is reproducible and independent of generation order.
+    
     Args:
         num_engines: Number of different engines to simulate
         cycles_per_engine: Number of operational cycles per engine
@@ -19,96 +57,83 @@ def create_sample_dataset(num_engines=10, cycles_per_engine=200):
     Returns:
         DataFrame with complete turbofan engine data
     """
-    np.random.seed(42)  # For reproducibility
+    n_rows = num_engines * cycles_per_engine
+    cycles = np.arange(1, cycles_per_engine + 1)
+    columns = {name: np.empty(n_rows) for name in ['setting_1', 'setting_2', 'setting_3']}
+    base, trend, noise_std = SENSOR_PROFILES.T
+    sensors = np.empty((n_rows, len(SENSOR_PROFILES)))
+    rul = np.empty(n_rows)
     
-    all_data = []
+    # Independent random stream per engine, seeded for reproducibility
+    seeds = np.random.SeedSequence(42).spawn(num_engines)
     
-    for engine_id in range(1, num_engines + 1):
+    for engine, seed in enumerate(seeds):
+        rng = np.random.Generator(np.random.PCG64DXSM(seed))
+        rows = slice(engine * cycles_per_engine, (engine + 1) * cycles_per_engine)
+        
         # Each engine has different degradation characteristics
-        degradation_rate = np.random.uniform(0.8, 1.2)  # Different degradation speeds
-        noise_level = np.random.uniform(0.1, 0.3)       # Different noise levels
+        degradation_rate = rng.uniform(0.8, 1.2)  # Different degradation speeds
+        noise_level = rng.uniform(0.1, 0.3)       # Different noise levels
         
-        for cycle in range(1, cycles_per_engine + 1):
-            # Operational settings (flight conditions)
-            altitude = np.random.uniform(0, 42000)  # feet
-            mach_number = np.random.uniform(0.2, 0.84)
-            throttle_resolver_angle = np.random.uniform(20, 25)
-            
-            # Normalize settings
-            setting_1 = (altitude - 21000) / 21000
-            setting_2 = (mach_number - 0.52) / 0.32
-            setting_3 = (throttle_resolver_angle - 22.5) / 2.5
-            
-            # Base sensor readings (21 sensors)
-            sensors = {}
-            
-            # Temperature sensors (affected by degradation)
-            sensors['sensor_1'] = 518.67 + np.random.normal(0, 1)  # Fan inlet temperature
-            sensors['sensor_2'] = 642.35 + degradation_rate * cycle * 0.1 + np.random.normal(0, noise_level)  # LPC outlet temperature
-            sensors['sensor_3'] = 1589.70 + degradation_rate * cycle * 0.2 + np.random.normal(0, noise_level)  # HPC outlet temperature
-            sensors['sensor_4'] = 1400.60 + degradation_rate * cycle * 0.15 + np.random.normal(0, noise_level)  # LPT outlet temperature
-            
-            # Pressure sensors
-            sensors['sensor_5'] = 14.62 + np.random.normal(0, 0.1)  # Fan inlet pressure
-            sensors['sensor_6'] = 21.61 + degradation_rate * cycle * 0.01 + np.random.normal(0, noise_level)  # bypass-duct pressure
-            sensors['sensor_7'] = 553.85 + degradation_rate * cycle * 0.5 + np.random.normal(0, noise_level)  # HPC outlet pressure
-            
-            # Flow and speed sensors
-            sensors['sensor_8'] = 2388.02 + np.random.normal(0, 5)  # Physical fan speed
-            sensors['sensor_9'] = 9046.19 + np.random.normal(0, 10)  # Physical core speed
-            sensors['sensor_10'] = 1.30 + np.random.normal(0, 0.01)  # Engine pressure ratio
-            sensors['sensor_11'] = 47.47 + degradation_rate * cycle * 0.02 + np.random.normal(0, noise_level)  # Static pressure at HPC outlet
-            
-            # Fuel and efficiency sensors
-            sensors['sensor_12'] = 521.66 + degradation_rate * cycle * 0.05 + np.random.normal(0, noise_level)  # Ratio of fuel flow to Ps30
-            sensors['sensor_13'] = 2388.02 + np.random.normal(0, 5)  # Corrected fan speed
-            sensors['sensor_14'] = 8138.62 + np.random.normal(0, 10)  # Corrected core speed
-            sensors['sensor_15'] = 8.4195 + degradation_rate * cycle * 0.001 + np.random.normal(0, noise_level)  # Bypass Ratio
-            
-            # Additional operational sensors
-            sensors['sensor_16'] = 0.03 + np.random.normal(0, 0.001)  # Burner fuel-air ratio
-            sensors['sensor_17'] = 392.0 + degradation_rate * cycle * 0.1 + np.random.normal(0, noise_level)  # Bleed Enthalpy
-            sensors['sensor_18'] = 2388.0 + np.random.normal(0, 5)  # Required fan speed
-            sensors['sensor_19'] = 100.0 + np.random.normal(0, 1)  # Required fan conversion speed
-            sensors['sensor_20'] = 38.86 + degradation_rate * cycle * 0.02 + np.random.normal(0, noise_level)  # High-pressure turbine coolant bleed
-            sensors['sensor_21'] = 23.419 + degradation_rate * cycle * 0.01 + np.random.normal(0, noise_level)  # Low-pressure turbine coolant bleed
-            
-            # Add operational setting influences
-            for sensor_key in sensors:
-                sensors[sensor_key] += 0.1 * setting_1 + 0.05 * setting_2 + 0.02 * setting_3
-            
-            # Calculate RUL (Remaining Useful Life)
-            max_cycles = cycles_per_engine
-            rul = max(1, max_cycles - cycle + np.random.normal(0, 5))
-            
-            # Determine failure modes based on sensor patterns
-            failure_mode = 'normal'
-            if sensors['sensor_2'] > 650 or sensors['sensor_3'] > 1600:
-                failure_mode = 'overheating'
-            elif sensors['sensor_7'] < 500 or sensors['sensor_11'] < 45:
-                failure_mode = 'pressure_drop'
-            elif abs(sensors['sensor_8'] - 2388) > 50 or abs(sensors['sensor_9'] - 9046) > 100:
-                failure_mode = 'speed_deviation'
-            
-            # Create data row
-            row = {
-                'engine_id': f'ENGINE-{engine_id:03d}',
-                'cycle': cycle,
-                'setting_1': setting_1,
-                'setting_2': setting_2,
-                'setting_3': setting_3,
-                **sensors,
-                'rul': rul,
-                'failure_mode': failure_mode,
-                'timestamp': datetime.now() - timedelta(days=30) + timedelta(hours=cycle)
-            }
-            
-            all_data.append(row)
+        # Operational settings (flight conditions), normalized
+        setting_1 = (rng.uniform(0, 42000, cycles_per_engine) - 21000) / 21000  # altitude in feet
+        setting_2 = (rng.uniform(0.2, 0.84, cycles_per_engine) - 0.52) / 0.32  # mach number
+        setting_3 = (rng.uniform(20, 25, cycles_per_engine) - 22.5) / 2.5  # throttle resolver angle
+        columns['setting_1'][rows] = setting_1
+        columns['setting_2'][rows] = setting_2
+        columns['setting_3'][rows] = setting_3
+        
+        # Sensor readings drift with degradation, plus operational setting influences,
+        # computed for all sensors at once as a (cycles, sensors) block
+        noise = rng.normal(0, np.where(np.isnan(noise_std), noise_level, noise_std)[:, None],
+                           (len(SENSOR_PROFILES), cycles_per_engine)).T
+        offset = 0.1 * setting_1 + 0.05 * setting_2 + 0.02 * setting_3
+        sensors[rows] = base + np.outer(cycles, degradation_rate * trend) + noise + offset[:, None]
+        
+        # Calculate RUL (Remaining Useful Life)
+        rul[rows] = np.maximum(1, cycles_per_engine - cycles + rng.normal(0, 5, cycles_per_engine))
+    
+    columns.update((f'sensor_{i}', sensors[:, i - 1]) for i in range(1, len(SENSOR_PROFILES) + 1))
+    columns['rul'] = rul
     
-    return pd.DataFrame(all_data)
+    # Determine failure modes based on sensor patterns
+    failure_mode = np.select(
+        [
+            (columns['sensor_2'] > 650) | (columns['sensor_3'] > 1600),
+            (columns['sensor_7'] < 500) | (columns['sensor_11'] < 45),
+            (np.abs(columns['sensor_8'] - 2388) > 50) | (np.abs(columns['sensor_9'] - 9046) > 100)
+        ],
+        FAILURE_MODES[1:],
+        default=FAILURE_MODES[0]
+    )
+    
+    cycle = np.tile(cycles, num_engines)
+    start = np.datetime64(datetime.now() - timedelta(days=30), 'us')
+    
+    return pd.DataFrame({
+        'engine_id': np.repeat([f'ENGINE-{i:03d}' for i in range(1, num_engines + 1)], cycles_per_engine),
+        'cycle': cycle,
+        **columns,
+        'failure_mode': failure_mode,
+        'timestamp': start + cycle.astype('timedelta64[h]')
+    })
 
-def save_sample_datasets():
-    """Save sample datasets in different formats"""
+def _write_dataset(df, path, fmt):
+    """Write a dataset as CSV, or as zstd-compressed Parquet (requires pyarrow)"""
+    if fmt == 'parquet':
+        df.to_parquet(path, engine='pyarrow', compression='zstd', index=False)
+    else:
+        df.to_csv(path, index=False)
+
+def save_sample_datasets(fmt='csv'):
+    """
+    Save sample datasets in different formats
+    
+    Args:
+        fmt: 'csv' (read by the data API) or 'parquet'
+    """
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError("fmt must be 'csv' or 'parquet'")
     
     # Create data directory if it doesn't exist
     os.makedirs('sample_datasets', exist_ok=True)
@@ -124,19 +149,20 @@ def save_sample_datasets():
         print(f"Generating {size} dataset...")
         df = create_sample_dataset(params['engines'], params['cycles'])
         
-        # Save as CSV
-        csv_path = f'sample_datasets/turbofan_data_{size}.csv'
-        df.to_csv(csv_path, index=False)
-        print(f"Saved {csv_path} ({len(df)} rows)")
+        # Save the full dataset
+        data_path = f'sample_datasets/turbofan_data_{size}.{fmt}'
+        _write_dataset(df, data_path, fmt)
+        print(f"Saved {data_path} ({len(df)} rows)")
         
-        # Save training/test split
-        train_df = df.sample(frac=0.8, random_state=42)
-        test_df = df.drop(train_df.index)
+        # Save training/test split from one row mask, so only the two
+        # written subsets are materialized
+        is_train = np.zeros(len(df), dtype=bool)
+        is_train[df.sample(frac=0.8, random_state=42).index] = True
         
-        train_df.to_csv(f'sample_datasets/turbofan_train_{size}.csv', index=False)
-        test_df.to_csv(f'sample_datasets/turbofan_test_{size}.csv', index=False)
+        _write_dataset(df[is_train], f'sample_datasets/turbofan_train_{size}.{fmt}', fmt)
+        _write_dataset(df[~is_train], f'sample_datasets/turbofan_test_{size}.{fmt}', fmt)
         
-        print(f"Saved train/test split: {len(train_df)} train, {len(test_df)} test samples")
+        print(f"Saved train/test split: {int(is_train.sum())} train, {int((~is_train).sum())} test samples")
 
 def get_data_description():
     """Get description of the dataset features"""
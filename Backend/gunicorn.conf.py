@@ -0,0 +1,53 @@
+"""
+Gunicorn configuration for the Predictive Maintenance API
+
+Usage (from the Backend directory):
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+"""
+
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# One process per core; threads overlap I/O and native model calls within a worker
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, os.cpu_count() or 1)))
+worker_class = 'gthread'
+threads = 4
+
+# Load the models once in the master and fork workers that share them
+preload_app = True
+
+timeout = 30
+keepalive = 30
+max_requests = 1000
+max_requests_jitter = 100
+
+# Workers write their metrics to this directory so /metrics can aggregate them
+# across processes; it must be set before prometheus_client is first imported.
+# A fresh directory per start keeps samples from a previous run out, and is
+# removed on exit; a directory set by the user is left alone.
+_created_metrics_dir = None
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    _created_metrics_dir = tempfile.mkdtemp(prefix='pm-metrics-')
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = _created_metrics_dir
+
+# Run the explainer self-test in each worker, not in the preloading master:
+# threads do not survive fork, and the master serves no requests
+os.environ.setdefault('EXPLAINER_HEALTH_PROBE_AT_INIT', 'False')
+
+def post_fork(server, worker):
+    """Start the worker's explainer self-test"""
+    from api.explainability_api import start_health_probe
+    start_health_probe(worker.app.wsgi())
+
+def child_exit(server, worker):
+    """Drop an exited worker's live gauges from the aggregated metrics"""
+    from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+    GunicornInternalPrometheusMetrics.mark_process_dead_on_child_exit(worker.pid)
+
+def on_exit(server):
+    """Remove the metrics directory this config created"""
+    if _created_metrics_dir:
+        shutil.rmtree(_created_metrics_dir, ignore_errors=True)
@@ -4,25 +4,59 @@ Initializes models, creates sample data, and prepares the environment
 """
 
 import os
+import re
+import stat
 import sys
+import hashlib
 import subprocess
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Hash of the last successfully installed requirements, to skip pip on re-runs
+REQUIREMENTS_HASH_FILE = os.path.join('.setup_cache', 'req.sha')
+PIP_CACHE_DIR = '.pip-cache'
+
+def _requirements_hash():
+    """Hash requirements.txt together with the interpreter it is installed into"""
+    with open('requirements.txt', 'rb') as f:
+        data = f.read()
+    return hashlib.sha256(sys.executable.encode() + b'\0' + data).hexdigest()
+
 def install_requirements():
-    """Install required Python packages"""
+    """Install required Python packages, unless they are unchanged since the last install"""
+    requirements_hash = _requirements_hash()
+    try:
+        with open(REQUIREMENTS_HASH_FILE) as f:
+            if f.read().strip() == requirements_hash:
+                logger.info("✅ Requirements unchanged, skipping pip")
+                return True
+    except OSError:
+        pass
+    
     logger.info("Installing required packages...")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+        # Prefer prebuilt wheels and keep downloads in a project-local cache
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install",
+            "--prefer-binary", "--cache-dir", PIP_CACHE_DIR,
+            "--disable-pip-version-check", "-q",
+            "-r", "requirements.txt"
+        ])
         logger.info("✅ Requirements installed successfully")
-        return True
     except subprocess.CalledProcessError as e:
         logger.error(f"❌ Failed to install requirements: {e}")
         return False
+    
+    os.makedirs(os.path.dirname(REQUIREMENTS_HASH_FILE), exist_ok=True)
+    with open(REQUIREMENTS_HASH_FILE, 'w') as f:
+        f.write(requirements_hash)
+    return True
 
 def create_directories():
     """Create necessary directories"""
@@ -34,8 +68,10 @@ def create_directories():
     ]
     
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
-        logger.info(f"✅ Created directory: {directory}")
+        path = Path(directory)
+        if not path.is_dir():
+            path.mkdir(parents=True, exist_ok=True)
+            logger.info(f"✅ Created directory: {directory}")
 
 def generate_sample_data():
     """Generate sample datasets"""
@@ -68,24 +104,44 @@ def test_model_loading():
         from AI.model_manager import ModelManager
         model_manager = ModelManager()
         
-        # Test predictions
+        # Test predictions through the batch entry points the API uses
         import numpy as np
-        test_data = np.random.normal(0, 1, 24)
+        test_data = np.random.normal(0, 1, (1, 24))
         
-        rul_pred, rul_meta = model_manager.predict_rul(test_data)
-        risk_pred, risk_meta = model_manager.predict_failure_risk(test_data)
-        anomaly_pred, anomaly_meta = model_manager.detect_anomaly(test_data)
+        rul_pred, rul_meta = model_manager.predict_rul_batch(test_data)
+        risk_pred, risk_meta = model_manager.predict_failure_risk_batch(test_data)
+        anomaly_pred, anomaly_meta = model_manager.detect_anomaly_batch(test_data)
         
         logger.info(f"✅ Model testing successful:")
-        logger.info(f"   RUL Prediction: {rul_pred:.2f} hours")
-        logger.info(f"   Risk Level: {risk_pred}")
-        logger.info(f"   Anomaly Detected: {anomaly_pred}")
+        logger.info(f"   RUL Prediction: {rul_pred[0]:.2f} hours")
+        logger.info(f"   Risk Level: {risk_pred[0]}")
+        logger.info(f"   Anomaly Detected: {anomaly_pred[0]}")
         
         return True
     except Exception as e:
         logger.error(f"❌ Model testing failed: {e}")
         return False
 
+def _write_if_changed(path, content):
+    """
+    Write content to path unless the file already holds it
+    
+    A leading "# Generated on" line is ignored in the comparison, so re-runs
+    don't rewrite a file just to update its timestamp. Returns True if the
+    file was written.
+    """
+    def body(text):
+        return re.sub(r'^# Generated on .*\n', '', text, flags=re.MULTILINE)
+    
+    # Written as UTF-8 bytes, so line endings stay LF on every platform
+    data = content.encode('utf-8')
+    file_path = Path(path)
+    if file_path.is_file() and body(file_path.read_bytes().decode('utf-8', 'replace')) == body(content):
+        return False
+    
+    file_path.write_bytes(data)
+    return True
+
 def create_env_file():
     """Create environment configuration file"""
     env_content = f"""# Explainable Predictive Maintenance Backend Configuration
@@ -112,10 +168,10 @@ CORS_ORIGINS=http://localhost:8080,http://localhost:3000
 # DATABASE_URL=sqlite:///predictive_maintenance.db
 """
     
-    with open('.env', 'w') as f:
-        f.write(env_content)
-    
-    logger.info("✅ Environment file created (.env)")
+    if _write_if_changed('.env', env_content):
+        logger.info("✅ Environment file created (.env)")
+    else:
+        logger.info("✅ Environment file unchanged (.env)")
 
 def create_startup_script():
     """Create startup script for easy server launch"""
@@ -138,8 +194,7 @@ python app.py
 pause
 """
     
-    with open('start_server.bat', 'w') as f:
-        f.write(windows_script)
+    changed = _write_if_changed('start_server.bat', windows_script)
     
     # Unix shell script
     unix_script = """#!/bin/bash
@@ -157,16 +212,19 @@ echo "Starting Flask server on http://localhost:5000"
 python app.py
 """
     
-    with open('start_server.sh', 'w') as f:
-        f.write(unix_script)
+    changed = _write_if_changed('start_server.sh', unix_script) or changed
     
     # Make shell script executable
     try:
-        os.chmod('start_server.sh', 0o755)
+        if stat.S_IMODE(os.stat('start_server.sh').st_mode) != 0o755:
+            os.chmod('start_server.sh', 0o755)
     except:
         pass  # Windows doesn't support chmod
     
-    logger.info("✅ Startup scripts created (start_server.bat, start_server.sh)")
+    if changed:
+        logger.info("✅ Startup scripts created (start_server.bat, start_server.sh)")
+    else:
+        logger.info("✅ Startup scripts unchanged (start_server.bat, start_server.sh)")
 
 def main():
     """Main setup function"""
@@ -174,35 +232,35 @@ def main():
     logger.info("=" * 60)
     
     success_count = 0
-    total_steps = 6
+    total_steps = 7
     
-    # Step 1: Create directories
-    create_directories()
-    success_count += 1
-    
-    # Step 2: Install requirements
+    # Step 1: Install requirements (the remaining steps import them)
     if install_requirements():
         success_count += 1
     
-    # Step 3: Create environment file
-    create_env_file()
-    success_count += 1
-    
-    # Step 4: Generate sample data
-    if generate_sample_data():
-        success_count += 1
-    
-    # Step 5: Create pretrained models
-    if create_pretrained_models():
-        success_count += 1
+    # Steps 2-6 are independent, so run them concurrently; steps without a
+    # return value count as successful unless they raise
+    steps = [
+        create_directories,
+        create_env_file,
+        generate_sample_data,
+        create_pretrained_models,
+        create_startup_script
+    ]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {executor.submit(step): step for step in steps}
+        for future in as_completed(futures):
+            step = futures[future]
+            try:
+                if future.result() is not False:
+                    success_count += 1
+            except Exception as e:
+                logger.error(f"❌ {step.__name__} failed: {e}")
     
-    # Step 6: Test model loading
+    # Step 7: Test model loading (needs the saved models)
     if test_model_loading():
         success_count += 1
     
-    # Create startup scripts
-    create_startup_script()
-    
     # Final summary
     logger.info("=" * 60)
     logger.info(f"Setup completed: {success_count}/{total_steps} steps successful")
@@ -3,219 +3,264 @@ Test script for Explainable Predictive Maintenance API
 Tests all endpoints with sample data
 """
 
+import argparse
+import csv
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import orjson
+import statistics
 import numpy as np
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 
 # API base URL
 BASE_URL = "http://localhost:5000"
 
+# Seeded generator shared by all tests; its bit generator is locked, so
+# concurrent tests can draw from it safely
+RNG = np.random.default_rng(42)
+
+# Shared keep-alive session, pooled so concurrent tests reuse connections
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# Tests run concurrently, so each one buffers its output and it is printed
+# in order once the test finishes
+_output = threading.local()
+
+def report(message=""):
+    """Record a line of test output for the current test"""
+    lines = getattr(_output, 'lines', None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
+
 def test_health_check():
     """Test basic health check"""
-    print("🔍 Testing health check...")
+    report("🔍 Testing health check...")
     try:
-        response = requests.get(f"{BASE_URL}/")
+        response = SESSION.get(f"{BASE_URL}/")
         if response.status_code == 200:
-            print("✅ Health check passed")
+            report("✅ Health check passed")
             return True
         else:
-            print(f"❌ Health check failed: {response.status_code}")
+            report(f"❌ Health check failed: {response.status_code}")
             return False
     except requests.exceptions.ConnectionError:
-        print("❌ Cannot connect to server. Is it running?")
+        report("❌ Cannot connect to server. Is it running?")
         return False
 
 def test_api_status():
     """Test API status endpoint"""
-    print("🔍 Testing API status...")
+    report("🔍 Testing API status...")
     try:
-        response = requests.get(f"{BASE_URL}/api/v1/status")
+        response = SESSION.get(f"{BASE_URL}/api/v1/status")
         if response.status_code == 200:
-            data = response.json()
-            print(f"✅ API Status: {data.get('status', 'unknown')}")
-            print(f"   Models loaded: {data.get('models', {}).get('healthy_models', 0)}")
+            data = orjson.loads(response.content)
+            report(f"✅ API Status: {data.get('status', 'unknown')}")
+            report(f"   Models loaded: {data.get('models', {}).get('healthy_models', 0)}")
             return True
         else:
-            print(f"❌ API status failed: {response.status_code}")
+            report(f"❌ API status failed: {response.status_code}")
             return False
     except Exception as e:
-        print(f"❌ API status error: {e}")
+        report(f"❌ API status error: {e}")
         return False
 
-def generate_sample_sensor_data():
-    """Generate sample sensor data for testing"""
-    # Generate realistic sensor data (24 features)
-    np.random.seed(42)
-    
-    # 3 operational settings
-    settings = np.random.normal(0, 1, 3)
-    
-    # 21 sensor readings
-    sensors = np.random.normal(0, 1, 21)
+def generate_sample_sensor_data(num_machines=None):
+    """
+    Generate sample sensor data for testing
     
-    # Combine all features
-    sensor_data = np.concatenate([settings, sensors]).tolist()
-    
-    return sensor_data
+    Returns one list of 24 features (3 operational settings followed by
+    21 sensor readings), or a list of num_machines such lists.
+    """
+    if num_machines is None:
+        return RNG.standard_normal(24).tolist()
+    return RNG.standard_normal((num_machines, 24)).tolist()
+
+# Request bodies shared by the tests, generated and serialized once per run
+JSON_HEADERS = {"Content-Type": "application/json"}
+_SAMPLE = generate_sample_sensor_data()
+_PAYLOAD_BYTES = orjson.dumps({
+    "sensor_data": _SAMPLE,
+    "machine_id": "TEST-MACHINE-001"
+})
+_BATCH_PAYLOAD_BYTES = orjson.dumps({
+    "machines": [
+        {"machine_id": f"TEST-MACHINE-{i+1:03d}", "sensor_data": sensor_data}
+        for i, sensor_data in enumerate(generate_sample_sensor_data(3))
+    ],
+    "prediction_types": ["rul", "failure_risk", "anomaly"]
+})
+
+# Same sample as raw little-endian float32, for the binary RUL endpoint
+BINARY_HEADERS = {"Content-Type": "application/octet-stream", "X-Machine-Id": "TEST-MACHINE-001"}
+_SAMPLE_BYTES = np.asarray(_SAMPLE, dtype='<f4').tobytes()
 
 def test_rul_prediction():
     """Test RUL prediction endpoint"""
-    print("🔍 Testing RUL prediction...")
+    report("🔍 Testing RUL prediction...")
     try:
-        sensor_data = generate_sample_sensor_data()
-        
-        payload = {
-            "sensor_data": sensor_data,
-            "machine_id": "TEST-MACHINE-001"
-        }
-        
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/v1/prediction/rul",
-            json=payload,
-            headers={"Content-Type": "application/json"}
+            data=_PAYLOAD_BYTES,
+            headers=JSON_HEADERS
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             rul = data.get('rul_prediction', 0)
             risk_level = data.get('risk_level', 'unknown')
             confidence = data.get('confidence', 0)
             
-            print(f"✅ RUL Prediction successful")
-            print(f"   RUL: {rul:.2f} hours")
-            print(f"   Risk Level: {risk_level}")
-            print(f"   Confidence: {confidence:.3f}")
+            report(f"✅ RUL Prediction successful")
+            report(f"   RUL: {rul:.2f} hours")
+            report(f"   Risk Level: {risk_level}")
+            report(f"   Confidence: {confidence:.3f}")
             return True
         else:
-            print(f"❌ RUL prediction failed: {response.status_code}")
-            print(f"   Error: {response.text}")
+            report(f"❌ RUL prediction failed: {response.status_code}")
+            report(f"   Error: {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ RUL prediction error: {e}")
+        report(f"❌ RUL prediction error: {e}")
+        return False
+
+def test_rul_prediction_binary():
+    """Test RUL prediction endpoint with a binary float32 body"""
+    report("🔍 Testing binary RUL prediction...")
+    try:
+        response = SESSION.post(
+            f"{BASE_URL}/api/v1/prediction/rul",
+            data=_SAMPLE_BYTES,
+            headers=BINARY_HEADERS
+        )
+        
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            rul = data.get('rul_prediction', 0)
+            
+            report(f"✅ Binary RUL Prediction successful")
+            report(f"   RUL: {rul:.2f} hours")
+            report(f"   Request body: {len(_SAMPLE_BYTES)} bytes (JSON: {len(_PAYLOAD_BYTES)} bytes)")
+            return True
+        else:
+            report(f"❌ Binary RUL prediction failed: {response.status_code}")
+            report(f"   Error: {response.text}")
+            return False
+            
+    except Exception as e:
+        report(f"❌ Binary RUL prediction error: {e}")
         return False
 
 def test_failure_risk_prediction():
     """Test failure risk prediction endpoint"""
-    print("🔍 Testing failure risk prediction...")
+    report("🔍 Testing failure risk prediction...")
     try:
-        sensor_data = generate_sample_sensor_data()
-        
-        payload = {
-            "sensor_data": sensor_data,
-            "machine_id": "TEST-MACHINE-001"
-        }
-        
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/v1/prediction/failure-risk",
-            json=payload,
-            headers={"Content-Type": "application/json"}
+            data=_PAYLOAD_BYTES,
+            headers=JSON_HEADERS
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             risk_class = data.get('risk_class', 'unknown')
             confidence = data.get('confidence', 0)
             probabilities = data.get('probabilities', {})
             
-            print(f"✅ Failure risk prediction successful")
-            print(f"   Risk Class: {risk_class}")
-            print(f"   Confidence: {confidence:.3f}")
-            print(f"   Probabilities: {probabilities}")
+            report(f"✅ Failure risk prediction successful")
+            report(f"   Risk Class: {risk_class}")
+            report(f"   Confidence: {confidence:.3f}")
+            report(f"   Probabilities: {probabilities}")
             return True
         else:
-            print(f"❌ Failure risk prediction failed: {response.status_code}")
-            print(f"   Error: {response.text}")
+            report(f"❌ Failure risk prediction failed: {response.status_code}")
+            report(f"   Error: {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ Failure risk prediction error: {e}")
+        report(f"❌ Failure risk prediction error: {e}")
         return False
 
 def test_anomaly_detection():
     """Test anomaly detection endpoint"""
-    print("🔍 Testing anomaly detection...")
+    report("🔍 Testing anomaly detection...")
     try:
-        sensor_data = generate_sample_sensor_data()
-        
-        payload = {
-            "sensor_data": sensor_data,
-            "machine_id": "TEST-MACHINE-001"
-        }
-        
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/v1/anomaly/detect",
-            json=payload,
-            headers={"Content-Type": "application/json"}
+            data=_PAYLOAD_BYTES,
+            headers=JSON_HEADERS
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             is_anomaly = data.get('is_anomaly', False)
             severity = data.get('severity', 'unknown')
             anomaly_score = data.get('anomaly_score', 0)
             
-            print(f"✅ Anomaly detection successful")
-            print(f"   Is Anomaly: {is_anomaly}")
-            print(f"   Severity: {severity}")
-            print(f"   Anomaly Score: {anomaly_score:.3f}")
+            report(f"✅ Anomaly detection successful")
+            report(f"   Is Anomaly: {is_anomaly}")
+            report(f"   Severity: {severity}")
+            report(f"   Anomaly Score: {anomaly_score:.3f}")
             return True
         else:
-            print(f"❌ Anomaly detection failed: {response.status_code}")
-            print(f"   Error: {response.text}")
+            report(f"❌ Anomaly detection failed: {response.status_code}")
+            report(f"   Error: {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ Anomaly detection error: {e}")
+        report(f"❌ Anomaly detection error: {e}")
         return False
 
 def test_shap_explanation():
     """Test SHAP explanation endpoint"""
-    print("🔍 Testing SHAP explanation...")
+    report("🔍 Testing SHAP explanation...")
     try:
-        sensor_data = generate_sample_sensor_data()
-        
         payload = {
-            "sensor_data": sensor_data,
+            "sensor_data": _SAMPLE,
             "model_type": "rul",
             "machine_id": "TEST-MACHINE-001",
             "max_features": 5
         }
         
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/v1/explainability/shap",
-            json=payload,
-            headers={"Content-Type": "application/json"}
+            data=orjson.dumps(payload),
+            headers=JSON_HEADERS
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             feature_importance = data.get('feature_importance', [])
             summary = data.get('summary', '')
             
-            print(f"✅ SHAP explanation successful")
-            print(f"   Top features analyzed: {len(feature_importance)}")
-            print(f"   Summary: {summary}")
+            report(f"✅ SHAP explanation successful")
+            report(f"   Top features analyzed: {len(feature_importance)}")
+            report(f"   Summary: {summary}")
             
             if feature_importance:
                 top_feature = feature_importance[0]
-                print(f"   Most important: {top_feature['feature']} (impact: {top_feature['shap_value']:.3f})")
+                report(f"   Most important: {top_feature['feature']} (impact: {top_feature['shap_value']:.3f})")
             
             return True
         else:
-            print(f"❌ SHAP explanation failed: {response.status_code}")
-            print(f"   Error: {response.text}")
+            report(f"❌ SHAP explanation failed: {response.status_code}")
+            report(f"   Error: {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ SHAP explanation error: {e}")
+        report(f"❌ SHAP explanation error: {e}")
         return False
 
 def test_sample_data_generation():
     """Test sample data generation"""
-    print("🔍 Testing sample data generation...")
+    report("🔍 Testing sample data generation...")
     try:
         payload = {
             "num_samples": 10,
@@ -223,73 +268,106 @@ def test_sample_data_generation():
             "include_targets": True
         }
         
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/v1/data/generate-sample",
-            json=payload,
-            headers={"Content-Type": "application/json"}
+            data=orjson.dumps(payload),
+            headers=JSON_HEADERS
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             samples = data.get('data', [])
             metadata = data.get('metadata', {})
             
-            print(f"✅ Sample data generation successful")
-            print(f"   Samples generated: {len(samples)}")
-            print(f"   Features per sample: {len(metadata.get('features', []))}")
+            report(f"✅ Sample data generation successful")
+            report(f"   Samples generated: {len(samples)}")
+            report(f"   Features per sample: {len(metadata.get('features', []))}")
             return True
         else:
-            print(f"❌ Sample data generation failed: {response.status_code}")
-            print(f"   Error: {response.text}")
+            report(f"❌ Sample data generation failed: {response.status_code}")
+            report(f"   Error: {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ Sample data generation error: {e}")
+        report(f"❌ Sample data generation error: {e}")
         return False
 
 def test_batch_prediction():
     """Test batch prediction endpoint"""
-    print("🔍 Testing batch prediction...")
+    report("🔍 Testing batch prediction...")
     try:
-        # Generate multiple machine data
-        machines = []
-        for i in range(3):
-            machines.append({
-                "machine_id": f"TEST-MACHINE-{i+1:03d}",
-                "sensor_data": generate_sample_sensor_data()
-            })
-        
-        payload = {
-            "machines": machines,
-            "prediction_types": ["rul", "failure_risk", "anomaly"]
-        }
-        
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/v1/prediction/batch",
-            json=payload,
-            headers={"Content-Type": "application/json"}
+            data=_BATCH_PAYLOAD_BYTES,
+            headers=JSON_HEADERS
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             results = data.get('results', [])
             successful = data.get('successful_predictions', 0)
             
-            print(f"✅ Batch prediction successful")
-            print(f"   Machines processed: {len(results)}")
-            print(f"   Successful predictions: {successful}")
+            report(f"✅ Batch prediction successful")
+            report(f"   Machines processed: {len(results)}")
+            report(f"   Successful predictions: {successful}")
             return True
         else:
-            print(f"❌ Batch prediction failed: {response.status_code}")
-            print(f"   Error: {response.text}")
+            report(f"❌ Batch prediction failed: {response.status_code}")
+            report(f"   Error: {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ Batch prediction error: {e}")
+        report(f"❌ Batch prediction error: {e}")
         return False
 
-def run_all_tests():
-    """Run all API tests"""
+def warm_up(iterations=2):
+    """Send throwaway RUL predictions so lazy server initialization isn't timed"""
+    for _ in range(iterations):
+        try:
+            SESSION.post(f"{BASE_URL}/api/v1/prediction/rul", data=_PAYLOAD_BYTES, headers=JSON_HEADERS)
+        except requests.exceptions.RequestException:
+            return  # The tests report the connection problem
+
+def _run_test(test_func, repeats=1, record=None, stop=None):
+    """
+    Run one test repeatedly
+    
+    Each run's (success, duration in nanoseconds) is passed to record as it
+    finishes, and further repeats are skipped once stop is set. Returns
+    (success, durations in nanoseconds, output lines); the test only passes
+    if every run passes, and only the first run's output is kept.
+    """
+    durations = []
+    success = True
+    try:
+        for i in range(repeats):
+            if i > 0 and stop is not None and stop.is_set():
+                break
+            _output.lines = []
+            start_time = time.perf_counter_ns()
+            run_success = bool(test_func())
+            duration = time.perf_counter_ns() - start_time
+            
+            durations.append(duration)
+            success = success and run_success
+            if record is not None:
+                record(run_success, duration)
+            if not run_success and stop is not None:
+                stop.set()
+            if i == 0:
+                lines = _output.lines
+        return success, durations, lines
+    finally:
+        _output.lines = None
+
+def run_all_tests(repeats=1, fail_fast=False, csv_path=None):
+    """
+    Run all API tests, timing each one over the given number of repeats
+    
+    With fail_fast, tests that haven't started are cancelled after the first
+    failure. With csv_path, every run is appended to that file as a
+    name,success,duration_ns row as soon as it finishes.
+    """
     print("🚀 Starting API Tests for Explainable Predictive Maintenance")
     print("=" * 70)
     
@@ -297,6 +375,7 @@ def run_all_tests():
         ("Health Check", test_health_check),
         ("API Status", test_api_status),
         ("RUL Prediction", test_rul_prediction),
+        ("RUL Prediction (binary)", test_rul_prediction_binary),
         ("Failure Risk Prediction", test_failure_risk_prediction),
         ("Anomaly Detection", test_anomaly_detection),
         ("SHAP Explanation", test_shap_explanation),
@@ -304,35 +383,66 @@ def run_all_tests():
         ("Batch Prediction", test_batch_prediction)
     ]
     
-    results = []
+    # Keep first-request costs out of the first test's timing
+    warm_up()
     
-    for test_name, test_func in tests:
-        print(f"\n📋 {test_name}")
-        print("-" * 50)
-        
-        start_time = time.time()
-        success = test_func()
-        end_time = time.time()
+    stop = threading.Event() if fail_fast else None
+    csv_lock = threading.Lock()
+    successful_tests = 0
+    summary = []
+    
+    with (open(csv_path, 'w', newline='') if csv_path else nullcontext()) as csv_file:
+        writer = csv.writer(csv_file) if csv_file else None
+        if writer:
+            writer.writerow(('name', 'success', 'duration_ns'))
         
-        results.append({
-            'name': test_name,
-            'success': success,
-            'duration': end_time - start_time
-        })
+        def recorder(test_name):
+            if writer is None:
+                return None
+            def record(success, duration):
+                with csv_lock:
+                    writer.writerow((test_name, success, duration))
+            return record
         
-        print(f"   Duration: {end_time - start_time:.2f}s")
+        # The endpoint tests are independent and I/O-bound, so run them together
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                (test_name, executor.submit(_run_test, test_func, repeats, recorder(test_name), stop))
+                for test_name, test_func in tests
+            ]
+            
+            for test_name, future in futures:
+                if future.cancelled():
+                    summary.append(f"⏭️  SKIP {test_name}")
+                    continue
+                
+                success, durations, lines = future.result()
+                min_duration = min(durations) / 1e9
+                median_duration = statistics.median(durations) / 1e9
+                
+                print(f"\n📋 {test_name}")
+                print("-" * 50)
+                for line in lines:
+                    print(line)
+                print(f"   Duration: {min_duration:.3f}s min, {median_duration:.3f}s median ({len(durations)} runs)")
+                
+                status = "✅ PASS" if success else "❌ FAIL"
+                summary.append(f"{status} {test_name:<30} ({min_duration:.3f}s min, {median_duration:.3f}s median)")
+                successful_tests += success
+                
+                if fail_fast and stop.is_set():
+                    for _, pending in futures:
+                        pending.cancel()
     
     # Summary
     print("\n" + "=" * 70)
     print("📊 TEST SUMMARY")
     print("=" * 70)
     
-    successful_tests = sum(1 for r in results if r['success'])
-    total_tests = len(results)
+    total_tests = len(tests)
     
-    for result in results:
-        status = "✅ PASS" if result['success'] else "❌ FAIL"
-        print(f"{status} {result['name']:<30} ({result['duration']:.2f}s)")
+    for line in summary:
+        print(line)
     
     print("-" * 70)
     print(f"Total: {successful_tests}/{total_tests} tests passed")
@@ -345,5 +455,11 @@ def run_all_tests():
     return successful_tests == total_tests
 
 if __name__ == "__main__":
-    success = run_all_tests()
+    parser = argparse.ArgumentParser(description="Test the Explainable Predictive Maintenance API")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per test for the min/median timings")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop starting tests after the first failure")
+    parser.add_argument("--csv", metavar="PATH", help="Write every run as a name,success,duration_ns row")
+    args = parser.parse_args()
+    
+    success = run_all_tests(max(1, args.repeats), args.fail_fast, args.csv)
     exit(0 if success else 1)
@@ -3,10 +3,24 @@ Configuration settings for the Predictive Maintenance API
 """
 
 import os
+from pathlib import Path
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Backend root directory, resolved once
+_BASE = Path(__file__).resolve().parent.parent
+
+def _model_spec(model_type, file, scaler):
+    """Read-only model entry, with the model file's absolute path precomputed"""
+    return MappingProxyType({
+        'type': model_type,
+        'file': file,
+        'path': _BASE / 'models' / file,
+        'scaler': scaler
+    })
+
 class Config:
     """Base configuration class"""
     
@@ -15,44 +29,45 @@ class Config:
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     
     # Model settings
-    MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models')
-    AI_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'AI')
-    DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    MODEL_DIR = _BASE / 'models'
+    AI_DIR = _BASE / 'AI'
+    DATA_DIR = _BASE / 'data'
     
     # API settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
-    # Model configuration
-    MODELS = {
-        'rul_predictor': {
-            'type': 'xgboost',
-            'file': 'rul_xgboost_model.pkl',
-            'scaler': 'rul_scaler.pkl'
-        },
-        'failure_classifier': {
-            'type': 'lightgbm',
-            'file': 'failure_lgb_model.pkl',
-            'scaler': 'failure_scaler.pkl'
-        },
-        'anomaly_detector': {
-            'type': 'isolation_forest',
-            'file': 'anomaly_isolation_forest.pkl',
-            'scaler': 'anomaly_scaler.pkl'
-        }
-    }
+    # Response compression (flask-compress), preferring zstd and brotli
+    COMPRESS_ALGORITHM = ['zstd', 'br', 'gzip']
+    COMPRESS_MIMETYPES = ['application/json']
+    COMPRESS_MIN_SIZE = 1024  # bytes, smaller responses are sent as-is
+    
+    # Request latency histogram buckets (seconds), sized for SHAP/LIME calls
+    METRICS_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+    
+    # Seconds between the explainer self-tests behind /api/v1/explainability/health
+    EXPLAINER_HEALTH_INTERVAL = float(os.environ.get('EXPLAINER_HEALTH_INTERVAL', '300'))
+    # Start them when the app is created; a preloading server starts them per worker instead
+    EXPLAINER_HEALTH_PROBE_AT_INIT = os.environ.get('EXPLAINER_HEALTH_PROBE_AT_INIT', 'True').lower() == 'true'
+    
+    # Model configuration (read-only)
+    MODELS = MappingProxyType({
+        'rul_predictor': _model_spec('xgboost', 'rul_xgboost_model.ubj', 'rul_scaler.pkl'),
+        'failure_classifier': _model_spec('lightgbm', 'failure_lgb_model.pkl', 'failure_scaler.pkl'),
+        'anomaly_detector': _model_spec('isolation_forest', 'anomaly_isolation_forest.pkl', 'anomaly_scaler.pkl')
+    })
     
     # Feature configuration
-    SENSOR_FEATURES = [
+    SENSOR_FEATURES = (
         'sensor_1', 'sensor_2', 'sensor_3', 'sensor_4', 'sensor_5',
         'sensor_6', 'sensor_7', 'sensor_8', 'sensor_9', 'sensor_10',
         'sensor_11', 'sensor_12', 'sensor_13', 'sensor_14', 'sensor_15',
         'sensor_16', 'sensor_17', 'sensor_18', 'sensor_19', 'sensor_20',
         'sensor_21'
-    ]
+    )
     
-    OPERATIONAL_SETTINGS = [
+    OPERATIONAL_SETTINGS = (
         'setting_1', 'setting_2', 'setting_3'
-    ]
+    )
     
     # Thresholds
     RUL_CRITICAL_THRESHOLD = 30  # cycles
@@ -0,0 +1,60 @@
+"""
+Fast JSON responses for the Flask app using orjson
+"""
+
+from typing import Any, Union
+
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes responses with orjson
+    
+    NumPy arrays and scalars are serialized natively, so results can be
+    returned without converting every value to a Python type first. Output
+    otherwise follows Flask's default provider: sorted keys, indented in
+    debug mode, and dates rendered through DefaultJSONProvider.default.
+    Request bodies are parsed with orjson too, falling back to the default
+    parser for input orjson rejects, such as NaN/Infinity literals.
+    """
+    
+    def _options(self, indent: bool) -> int:
+        option = (
+            orjson.OPT_SERIALIZE_NUMPY |
+            orjson.OPT_NON_STR_KEYS |
+            orjson.OPT_PASSTHROUGH_DATETIME |  # Keep Flask's date format
+            orjson.OPT_APPEND_NEWLINE
+        )
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs.keys() - {'indent', 'separators'}:
+            # Options orjson does not support, e.g. custom cls or default
+            return super().dumps(obj, **kwargs)
+        
+        return orjson.dumps(
+            obj, default=self.default, option=self._options(bool(kwargs.get('indent')))
+        ).decode()[:-1]
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._options(indent)),
+            mimetype=self.mimetype
+        )
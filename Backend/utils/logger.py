@@ -2,9 +2,21 @@
 Logging configuration for the Predictive Maintenance API
 """
 
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+def _start_queue_listener(queue_handler, file_handler):
+    """Feed queue_handler through a fresh queue to a background thread writing to file_handler"""
+    log_queue = queue.Queue(-1)
+    queue_handler.queue = log_queue
+    
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
 
 def setup_logger(app):
     """Setup application logging"""
@@ -17,7 +29,8 @@ def setup_logger(app):
         file_handler = RotatingFileHandler(
             'logs/predictive_maintenance.log',
             maxBytes=10240000,  # 10MB
-            backupCount=10
+            backupCount=10,
+            delay=True
         )
         
         file_handler.setFormatter(logging.Formatter(
@@ -25,7 +38,18 @@ def setup_logger(app):
         ))
         
         file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
+        
+        # Request threads only enqueue records; a listener thread does the file I/O
+        queue_handler = QueueHandler(queue.Queue(-1))
+        _start_queue_listener(queue_handler, file_handler)
+        
+        # Threads don't survive fork (gunicorn --preload), so each worker starts its own listener
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(
+                after_in_child=lambda: _start_queue_listener(queue_handler, file_handler)
+            )
+        
+        app.logger.addHandler(queue_handler)
         app.logger.setLevel(logging.INFO)
         app.logger.info('Predictive Maintenance API startup')
     
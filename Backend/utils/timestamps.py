@@ -0,0 +1,9 @@
+"""
+UTC timestamps for API responses
+"""
+
+from datetime import datetime, timezone
+
+def utc_now_iso() -> str:
+    """Current UTC time as an ISO 8601 string with millisecond precision and a +00:00 offset"""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds')
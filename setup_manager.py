@@ -8,11 +8,34 @@ import os
 import sys
 import subprocess
 import platform
+import shutil
+import socket
+import hashlib
+import importlib
 import json
 import time
+import threading
 import webbrowser
+from functools import cached_property
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+# Older pip releases in a fresh venv are upgraded before installing requirements
+MIN_PIP_VERSION = (23, 0)
+
+# Quiet, non-interactive pip runs; installs keep already-satisfied dependencies as they are
+PIP_FLAGS = ["--disable-pip-version-check", "--no-input"]
+PIP_INSTALL_FLAGS = [*PIP_FLAGS, "--upgrade-strategy=only-if-needed"]
+
+# Terminal emulators tried in order on Linux/macOS, with the arguments that run a command in them
+TERMINAL_EMULATORS = {
+    "gnome-terminal": ["gnome-terminal", "--"],
+    "konsole": ["konsole", "-e"],
+    "xfce4-terminal": ["xfce4-terminal", "-x"],
+    "xterm": ["xterm", "-e"],
+    "terminal": ["terminal", "-e"],
+}
+
 class Colors:
     """Console colors for better output formatting"""
     HEADER = '\033[95m'
@@ -25,66 +48,181 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+# Escape codes only mean something to a terminal; NO_COLOR (https://no-color.org) also turns them off
+if not sys.stdout.isatty() or os.environ.get("NO_COLOR") is not None:
+    for _name in [name for name in vars(Colors) if name.isupper()]:
+        setattr(Colors, _name, "")
+
+# Console screens, built once; {platform} is filled in when they are shown
+BANNER_TEMPLATE = f"""
+{Colors.HEADER}{Colors.BOLD}
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                   Explainable Predictive Maintenance                        ║
+║                         Universal Setup Manager                             ║
+║                                                                              ║
+║               Platform: {{platform:<20}}                              ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+{Colors.ENDC}"""
+
+MAIN_MENU_TEMPLATE = f"""
+{Colors.OKBLUE}{Colors.BOLD}Select Platform:{Colors.ENDC}
+{Colors.OKCYAN}1.{Colors.ENDC} Windows
+{Colors.OKCYAN}2.{Colors.ENDC} Linux
+{Colors.OKCYAN}3.{Colors.ENDC} Auto-detect ({{platform}})
+{Colors.OKCYAN}4.{Colors.ENDC} Exit
+
+Choose option (1-4): """
+
+OPTIONS_MENU = f"""
+{Colors.OKBLUE}{Colors.BOLD}Available Options:{Colors.ENDC}
+{Colors.OKCYAN}1.{Colors.ENDC} Start Frontend Development Server
+{Colors.OKCYAN}2.{Colors.ENDC} Start Backend API Server
+{Colors.OKCYAN}3.{Colors.ENDC} Run Both Frontend & Backend
+{Colors.OKCYAN}4.{Colors.ENDC} Test API Endpoints
+{Colors.OKCYAN}5.{Colors.ENDC} Complete Setup (Install Dependencies)
+{Colors.OKCYAN}6.{Colors.ENDC} Installation Guide
+{Colors.OKCYAN}7.{Colors.ENDC} Open Frontend in Browser
+{Colors.OKCYAN}8.{Colors.ENDC} Open Backend API in Browser
+{Colors.OKCYAN}9.{Colors.ENDC} Check System Requirements
+{Colors.OKCYAN}10.{Colors.ENDC} Back to Platform Selection
+{Colors.OKCYAN}0.{Colors.ENDC} Exit
+
+Choose option (0-10): """
+
 class SetupManager:
     def __init__(self):
         self.platform = platform.system().lower()
         self.project_root = Path(__file__).parent.absolute()
         self.frontend_path = self.project_root / "FrontEnd"
         self.backend_path = self.project_root / "Backend"
+        self._is_windows = self.platform == "windows"
+        # Wheels built from Backend/requirements.txt, reused by later installs
+        self.wheelhouse_path = self.project_root / ".wheelhouse"
+        # Serializes output from checks that run on worker threads
+        self._print_lock = threading.Lock()
+        # Versions of programs found on this run; they can't change mid-session
+        self._versions = {}
+        # exists() results for project paths, as {path: (parent_mtime_ns, exists)};
+        # paths this manager creates or removes are dropped explicitly as well
+        self._stat_cache = {}
         
     def print_banner(self):
         """Print application banner"""
-        banner = f"""
-{Colors.HEADER}{Colors.BOLD}
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                   Explainable Predictive Maintenance                        ║
-║                         Universal Setup Manager                             ║
-║                                                                              ║
-║               Platform: {self.platform.capitalize().ljust(20)}                              ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-{Colors.ENDC}"""
-        print(banner)
+        print(BANNER_TEMPLATE.format_map({"platform": self.platform.capitalize()}))
 
     def print_colored(self, message, color=Colors.OKGREEN):
         """Print colored message"""
-        print(f"{color}{message}{Colors.ENDC}")
+        with self._print_lock:
+            print(f"{color}{message}{Colors.ENDC}")
 
     def print_error(self, message):
         """Print error message"""
-        print(f"{Colors.FAIL}[ERROR] {message}{Colors.ENDC}")
+        with self._print_lock:
+            print(f"{Colors.FAIL}[ERROR] {message}{Colors.ENDC}")
 
     def print_success(self, message):
         """Print success message"""
-        print(f"{Colors.OKGREEN}[SUCCESS] {message}{Colors.ENDC}")
+        with self._print_lock:
+            print(f"{Colors.OKGREEN}[SUCCESS] {message}{Colors.ENDC}")
 
     def print_info(self, message):
         """Print info message"""
-        print(f"{Colors.OKBLUE}[INFO] {message}{Colors.ENDC}")
+        with self._print_lock:
+            print(f"{Colors.OKBLUE}[INFO] {message}{Colors.ENDC}")
 
     def print_warning(self, message):
         """Print warning message"""
-        print(f"{Colors.WARNING}[WARNING] {message}{Colors.ENDC}")
-
-    def run_command(self, command, cwd=None, shell=True):
-        """Execute a system command"""
+        with self._print_lock:
+            print(f"{Colors.WARNING}[WARNING] {message}{Colors.ENDC}")
+
+    @staticmethod
+    def program_argv(command):
+        """Resolve a command list's program on PATH, so shims like npm.cmd run without a shell"""
+        program = shutil.which(command[0])
+        return [program or command[0], *command[1:]]
+
+    def run_command(self, command, cwd=None, shell=True, label=None):
+        """
+        Execute a system command; list commands are run directly, without a shell
+        
+        With a label, output is echoed line by line as it arrives, prefixed
+        with the label, as well as being returned.
+        """
+        is_list = isinstance(command, list)
+        argv = self.program_argv(command) if is_list else command
+        shell = shell and not is_list
         try:
-            if isinstance(command, list):
-                result = subprocess.run(command, cwd=cwd, shell=shell, 
-                                      capture_output=True, text=True, check=True)
-            else:
-                result = subprocess.run(command, cwd=cwd, shell=shell, 
-                                      capture_output=True, text=True, check=True)
+            if label is not None:
+                return self._stream_command(argv, cwd, shell, label)
+            result = subprocess.run(argv, cwd=cwd, shell=shell,
+                                    capture_output=True, text=True, check=False)
             return result.returncode == 0, result.stdout, result.stderr
-        except subprocess.CalledProcessError as e:
-            return False, e.stdout, e.stderr
         except Exception as e:
+            # The command couldn't be started, e.g. its program doesn't exist
             return False, "", str(e)
 
+    def _stream_command(self, argv, cwd, shell, label):
+        """Run a command, echoing and collecting its stdout and stderr lines as they arrive"""
+        process = subprocess.Popen(argv, cwd=cwd, shell=shell, text=True, bufsize=1,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout_lines, stderr_lines = [], []
+        
+        def pump(pipe, lines, stream):
+            for line in pipe:
+                lines.append(line)
+                with self._print_lock:
+                    stream.write(f"[{label}] {line.rstrip()}\n")
+                    stream.flush()
+        
+        # One reader per pipe, so neither pipe can fill up while the other is read
+        readers = [
+            threading.Thread(target=pump, args=(process.stdout, stdout_lines, sys.stdout)),
+            threading.Thread(target=pump, args=(process.stderr, stderr_lines, sys.stderr)),
+        ]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        process.wait()
+        
+        return process.returncode == 0, "".join(stdout_lines), "".join(stderr_lines)
+
+    def _exists(self, path):
+        """path.exists(), reusing the last result while the parent directory's mtime is unchanged"""
+        try:
+            parent_mtime = path.parent.stat().st_mtime_ns
+        except OSError:
+            return False
+        cached = self._stat_cache.get(path)
+        if cached and cached[0] == parent_mtime:
+            return cached[1]
+        exists = path.exists()
+        self._stat_cache[path] = (parent_mtime, exists)
+        return exists
+
+    def probe_version(self, program):
+        """
+        Return (ok, version) from running `program --version`
+        
+        Missing programs are detected with a PATH lookup. Successful probes
+        are remembered for the session; failed ones are retried, so a program
+        installed after a failed check is picked up.
+        """
+        version = self._versions.get(program)
+        if version is None:
+            # A PATH lookup rules out missing programs without spawning anything
+            if shutil.which(program) is None:
+                return False, None
+            success, stdout, stderr = self.run_command([program, "--version"])
+            if not success:
+                return False, None
+            version = self._versions[program] = stdout.strip()
+        return True, version
+
     def check_python(self):
         """Check if Python is installed"""
-        success, stdout, stderr = self.run_command([sys.executable, "--version"])
+        success, version = self.probe_version(sys.executable)
         if success:
-            version = stdout.strip()
             self.print_success(f"Python found: {version}")
             return True
         else:
@@ -93,9 +231,8 @@ class SetupManager:
 
     def check_node(self):
         """Check if Node.js is installed"""
-        success, stdout, stderr = self.run_command(["node", "--version"], shell=True)
+        success, version = self.probe_version("node")
         if success:
-            version = stdout.strip()
             self.print_success(f"Node.js found: {version}")
             return True
         else:
@@ -105,9 +242,8 @@ class SetupManager:
 
     def check_npm(self):
         """Check if npm is installed"""
-        success, stdout, stderr = self.run_command(["npm", "--version"], shell=True)
+        success, version = self.probe_version("npm")
         if success:
-            version = stdout.strip()
             self.print_success(f"npm found: {version}")
             return True
         else:
@@ -115,20 +251,68 @@ class SetupManager:
             self.print_warning("npm comes with Node.js. Please install Node.js from https://nodejs.org/")
             return False
 
+    def check_git(self):
+        """Check if Git is installed (optional)"""
+        success, version = self.probe_version("git")
+        if success:
+            self.print_success(f"Git found: {version}")
+            return True
+        else:
+            self.print_warning("Git not found (optional but recommended)")
+            return False
+
+    def run_concurrently(self, funcs):
+        """Run independent steps concurrently, returning their results in order"""
+        with ThreadPoolExecutor(max_workers=len(funcs)) as executor:
+            futures = [executor.submit(func) for func in funcs]
+        return [future.result() for future in futures]
+
+    @cached_property
+    def venv_python(self):
+        """Python executable inside the backend virtual environment"""
+        if self._is_windows:
+            return self.backend_path / "venv" / "Scripts" / "python.exe"
+        return self.backend_path / "venv" / "bin" / "python"
+
+    @cached_property
+    def venv_pip(self):
+        """pip executable inside the backend virtual environment"""
+        if self._is_windows:
+            return self.backend_path / "venv" / "Scripts" / "pip.exe"
+        return self.backend_path / "venv" / "bin" / "pip"
+
     def create_venv(self):
-        """Create Python virtual environment"""
+        """
+        Create Python virtual environment
+        
+        A .venv-ready file is written once the venv has been created, so a
+        venv left half-built by an interrupted run is deleted and recreated.
+        """
         venv_path = self.backend_path / "venv"
+        sentinel = venv_path / ".venv-ready"
         
-        if venv_path.exists():
+        if sentinel.is_file():
             self.print_info("Virtual environment already exists")
             return True
+        
+        if venv_path.exists():
+            # Adopt venvs from before the sentinel existed if their Python runs
+            if self.probe_version(str(self.venv_python))[0]:
+                sentinel.touch()
+                self.print_info("Virtual environment already exists")
+                return True
+            self.print_warning("Virtual environment is incomplete, recreating it...")
+            shutil.rmtree(venv_path, ignore_errors=True)
+            self._stat_cache.pop(venv_path, None)
             
         self.print_info("Creating Python virtual environment...")
         success, stdout, stderr = self.run_command([
             sys.executable, "-m", "venv", str(venv_path)
         ], cwd=self.backend_path)
         
+        self._stat_cache.pop(venv_path, None)
         if success:
+            sentinel.touch()
             self.print_success("Virtual environment created successfully")
             return True
         else:
@@ -138,115 +322,165 @@ class SetupManager:
     def get_activate_command(self):
         """Get the activation command for the virtual environment"""
         venv_path = self.backend_path / "venv"
-        if self.platform == "windows":
+        if self._is_windows:
             return str(venv_path / "Scripts" / "activate.bat")
         else:
             return f"source {venv_path / 'bin' / 'activate'}"
 
+    def _pip_is_current(self):
+        """Whether the venv's pip is at least MIN_PIP_VERSION"""
+        success, version = self.probe_version(str(self.venv_pip))
+        if not success:
+            return False
+        # "pip 24.0 from /path/to/site-packages/pip (python 3.11)"
+        try:
+            release = tuple(int(part) for part in version.split()[1].split(".")[:2])
+        except (IndexError, ValueError):
+            return False
+        return release >= MIN_PIP_VERSION
+
+    def _refresh_wheelhouse(self):
+        """Build wheels for pip and requirements.txt into the wheelhouse if it is missing or older"""
+        requirements = self.backend_path / "requirements.txt"
+        wheelhouse = self.wheelhouse_path
+        if wheelhouse.exists() and wheelhouse.stat().st_mtime >= requirements.stat().st_mtime:
+            return True
+        
+        self.print_info("Building wheelhouse for Python dependencies...")
+        success, stdout, stderr = self.run_command([
+            str(self.venv_pip), "wheel", *PIP_FLAGS, "--prefer-binary",
+            "-w", str(wheelhouse), "pip", "-r", "requirements.txt"
+        ], cwd=self.backend_path, label="pip")
+        if success:
+            # Adding no new wheels leaves the directory's mtime alone
+            os.utime(wheelhouse)
+        return success
+
     def install_python_deps(self):
         """Install Python dependencies"""
         self.print_info("Installing Python dependencies...")
         
-        venv_path = self.backend_path / "venv"
-        if self.platform == "windows":
-            python_exe = venv_path / "Scripts" / "python.exe"
-            pip_exe = venv_path / "Scripts" / "pip.exe"
-        else:
-            python_exe = venv_path / "bin" / "python"
-            pip_exe = venv_path / "bin" / "pip"
-        
-        # Upgrade pip first
-        success, stdout, stderr = self.run_command([
-            str(pip_exe), "install", "--upgrade", "pip"
-        ], cwd=self.backend_path)
+        # Upgrade pip in the same run as the requirements, unless it is already
+        # recent enough; through `python -m pip`, since Windows won't let pip.exe
+        # replace itself
+        upgrade_pip = [] if self._pip_is_current() else ["--upgrade", "pip"]
+        pip = [str(self.venv_python), "-m", "pip"]
         
+        # Install requirements from the local wheelhouse, falling back to PyPI
+        # if a wheel is missing from it
+        success = self._refresh_wheelhouse()
+        if success:
+            success, stdout, stderr = self.run_command([
+                *pip, "install", *PIP_INSTALL_FLAGS, "--no-index",
+                "--find-links", str(self.wheelhouse_path), *upgrade_pip, "-r", "requirements.txt"
+            ], cwd=self.backend_path, label="pip")
         if not success:
-            self.print_warning("Failed to upgrade pip, continuing anyway...")
-        
-        # Install requirements
-        success, stdout, stderr = self.run_command([
-            str(pip_exe), "install", "-r", "requirements.txt"
-        ], cwd=self.backend_path)
+            self.print_warning("Installing from the wheelhouse failed, installing from PyPI...")
+            success, stdout, stderr = self.run_command([
+                *pip, "install", *PIP_INSTALL_FLAGS, "--prefer-binary", *upgrade_pip, "-r", "requirements.txt"
+            ], cwd=self.backend_path, label="pip")
         
         if success:
             self.print_success("Python dependencies installed successfully")
             return True
         else:
-            self.print_error(f"Failed to install Python dependencies: {stderr}")
+            self.print_error("Failed to install Python dependencies (see the [pip] output above)")
             return False
 
     def install_node_deps(self):
-        """Install Node.js dependencies"""
+        """
+        Install Node.js dependencies
+        
+        With a package-lock.json, installs use `npm ci` and record the
+        lockfile's hash in node_modules/.install-stamp; a later call with an
+        unchanged lockfile does nothing.
+        """
+        lockfile = self.frontend_path / "package-lock.json"
+        stamp = self.frontend_path / "node_modules" / ".install-stamp"
+        digest = hashlib.blake2b(lockfile.read_bytes()).hexdigest() if lockfile.exists() else None
+        
+        if digest and stamp.exists() and stamp.read_text().strip() == digest:
+            self.print_info("Node.js dependencies are up to date")
+            return True
+        
         self.print_info("Installing Node.js dependencies...")
         
         success, stdout, stderr = self.run_command([
-            "npm", "install"
-        ], cwd=self.frontend_path)
+            "npm", "ci" if digest else "install", "--prefer-offline", "--no-audit", "--no-fund"
+        ], cwd=self.frontend_path, label="npm")
+        self._stat_cache.pop(self.frontend_path / "node_modules", None)
         
         if success:
+            if digest:
+                stamp.write_text(digest)
             self.print_success("Node.js dependencies installed successfully")
             return True
         else:
-            self.print_error(f"Failed to install Node.js dependencies: {stderr}")
+            self.print_error("Failed to install Node.js dependencies (see the [npm] output above)")
             return False
 
+    def _wait_port(self, host, port, timeout=15.0, interval=0.1):
+        """Wait until host:port accepts TCP connections; False if it doesn't within timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with socket.create_connection((host, port), timeout=0.2):
+                    return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(interval)
+
+    @staticmethod
+    def open_console_window(command, cwd=None):
+        """Run command in a new console window that stays open after it exits (Windows only)"""
+        return subprocess.Popen(["cmd", "/k", *command], cwd=cwd, close_fds=True,
+                                creationflags=subprocess.CREATE_NEW_CONSOLE)
+
+    @staticmethod
+    def terminal_argv(command):
+        """Argv running command in a new window of the first installed terminal emulator, or None"""
+        terminal = next((name for name in TERMINAL_EMULATORS if shutil.which(name)), None)
+        if terminal is None:
+            return None
+        return [*TERMINAL_EMULATORS[terminal], *command]
+
     def start_backend(self):
         """Start the backend server in a new window"""
         self.print_info("Starting backend server in new window...")
         
         try:
-            if self.platform == "windows":
+            if self._is_windows:
                 # Use dedicated backend window batch file
                 window_batch_file = self.project_root / "start_backend_window.bat"
-                if window_batch_file.exists():
+                if self._exists(window_batch_file):
                     # Start backend in new window using dedicated batch file
-                    subprocess.Popen([
-                        "cmd", "/c", "start", "cmd", "/k", str(window_batch_file)
-                    ], shell=True)
+                    self.open_console_window([str(window_batch_file)], cwd=self.project_root)
                 else:
                     # Fallback to original method
                     batch_file = self.backend_path / "start_server.bat"
-                    if batch_file.exists():
-                        subprocess.Popen([
-                            "cmd", "/c", "start", "cmd", "/k", 
-                            f"cd /d {self.backend_path} && {batch_file}"
-                        ], shell=True)
+                    if self._exists(batch_file):
+                        self.open_console_window([str(batch_file)], cwd=self.backend_path)
                     else:
                         # Direct Python execution in new window
-                        venv_path = self.backend_path / "venv"
-                        python_exe = venv_path / "Scripts" / "python.exe"
-                        subprocess.Popen([
-                            "cmd", "/c", "start", "cmd", "/k",
-                            f"cd /d {self.backend_path} && {python_exe} app.py"
-                        ], shell=True)
+                        self.open_console_window([str(self.venv_python), "app.py"],
+                                                 cwd=self.backend_path)
             else:
                 # Linux/macOS - use terminal/gnome-terminal/xterm
                 shell_script = self.backend_path / "start_server.sh"
-                if shell_script.exists():
-                    # Try different terminal emulators
-                    terminal_commands = [
-                        ["gnome-terminal", "--", "bash", str(shell_script)],
-                        ["xterm", "-e", "bash", str(shell_script)],
-                        ["terminal", "-e", "bash", str(shell_script)],
-                    ]
-                    for cmd in terminal_commands:
-                        try:
-                            subprocess.Popen(cmd, cwd=self.backend_path)
-                            break
-                        except FileNotFoundError:
-                            continue
+                if self._exists(shell_script):
+                    terminal_cmd = self.terminal_argv(["bash", str(shell_script)])
+                    if terminal_cmd:
+                        subprocess.Popen(terminal_cmd, cwd=self.backend_path)
                     else:
                         # Fallback to background process
                         subprocess.Popen(["bash", str(shell_script)], cwd=self.backend_path)
                 else:
                     # Fallback to direct Python execution
-                    venv_path = self.backend_path / "venv"
-                    python_exe = venv_path / "bin" / "python"
-                    subprocess.Popen([str(python_exe), "app.py"], cwd=self.backend_path)
+                    subprocess.Popen([str(self.venv_python), "app.py"], cwd=self.backend_path)
             
             self.print_success("Backend server started in new window!")
             self.print_info("Backend running at: http://localhost:5000")
-            time.sleep(2)  # Give server time to start
             return True
             
         except Exception as e:
@@ -259,57 +493,39 @@ class SetupManager:
         
         try:
             # Check if npm is available
-            npm_check = subprocess.run(["npm", "--version"], 
-                                     capture_output=True, text=True, shell=True)
-            if npm_check.returncode != 0:
+            npm_ok, _ = self.probe_version("npm")
+            if not npm_ok:
                 self.print_error("npm not found. Please install Node.js from https://nodejs.org/")
                 return False
             
-            # Check if node_modules exists
-            node_modules = self.frontend_path / "node_modules"
-            if not node_modules.exists():
-                self.print_info("Installing frontend dependencies...")
-                install_result = subprocess.run(["npm", "install"], 
-                                               cwd=self.frontend_path, shell=True)
-                if install_result.returncode != 0:
-                    self.print_error("Failed to install frontend dependencies")
-                    return False
+            # Install dependencies if node_modules is missing or out of date
+            if not self.install_node_deps():
+                self.print_error("Failed to install frontend dependencies")
+                return False
             
             # Start the development server in a new window
-            if self.platform == "windows":
+            if self._is_windows:
                 # Use dedicated frontend window batch file
                 window_batch_file = self.project_root / "start_frontend_window.bat"
-                if window_batch_file.exists():
+                if self._exists(window_batch_file):
                     # Start frontend in new window using dedicated batch file
-                    subprocess.Popen([
-                        "cmd", "/c", "start", "cmd", "/k", str(window_batch_file)
-                    ], shell=True)
+                    self.open_console_window([str(window_batch_file)], cwd=self.project_root)
                 else:
                     # Fallback to direct command
-                    subprocess.Popen([
-                        "cmd", "/c", "start", "cmd", "/k",
-                        f"cd /d {self.frontend_path} && npm run dev"
-                    ], shell=True)
+                    self.open_console_window(["npm", "run", "dev"], cwd=self.frontend_path)
             else:
                 # Linux/macOS - use terminal emulators
-                terminal_commands = [
-                    ["gnome-terminal", "--", "bash", "-c", f"cd {self.frontend_path} && npm run dev"],
-                    ["xterm", "-e", f"cd {self.frontend_path} && npm run dev"],
-                    ["terminal", "-e", f"cd {self.frontend_path} && npm run dev"],
-                ]
-                for cmd in terminal_commands:
-                    try:
-                        subprocess.Popen(cmd)
-                        break
-                    except FileNotFoundError:
-                        continue
+                terminal_cmd = self.terminal_argv(
+                    ["bash", "-c", f"cd {self.frontend_path} && npm run dev"]
+                )
+                if terminal_cmd:
+                    subprocess.Popen(terminal_cmd, cwd=self.frontend_path)
                 else:
                     # Fallback to background process
-                    subprocess.Popen(["npm", "run", "dev"], cwd=self.frontend_path, shell=True)
+                    subprocess.Popen(self.program_argv(["npm", "run", "dev"]), cwd=self.frontend_path)
             
             self.print_success("Frontend development server started in new window!")
             self.print_info("Frontend running at: http://localhost:5173")
-            time.sleep(2)  # Give server time to start
             return True
             
         except FileNotFoundError:
@@ -325,26 +541,23 @@ class SetupManager:
         self.print_info("Starting both frontend and backend servers...")
         print()
         
-        # Start backend first
-        self.print_info("Starting backend server...")
-        backend_success = self.start_backend()
+        # The servers don't depend on each other to launch, so start them together
+        backend_success, frontend_success = self.run_concurrently([
+            self.start_backend, self.start_frontend
+        ])
         
         if not backend_success:
             self.print_error("Failed to start backend server. Aborting.")
             return False
         
-        # Wait a moment for backend to initialize
-        self.print_info("Waiting for backend to initialize...")
-        time.sleep(3)
-        
-        # Start frontend
-        self.print_info("Starting frontend server...")
-        frontend_success = self.start_frontend()
-        
         if not frontend_success:
             self.print_error("Backend started but frontend failed to start.")
             return False
         
+        self.print_info("Waiting for backend to initialize...")
+        if not self._wait_port("127.0.0.1", 5000):
+            self.print_warning("Backend is not accepting connections yet; check its window for errors")
+        
         # Final success message
         print()
         self.print_success("Both servers started successfully!")
@@ -359,9 +572,12 @@ class SetupManager:
             open_browser = input(f"{Colors.OKCYAN}Open both services in browser? (y/N): {Colors.ENDC}").strip().lower()
             if open_browser in ['y', 'yes']:
                 self.print_info("Opening services in browser...")
-                webbrowser.open("http://localhost:5000")
-                time.sleep(1)
-                webbrowser.open("http://localhost:5173")
+                # Open each tab once its server is listening, not after a guessed delay
+                for name, port in (("Backend API", 5000), ("Frontend UI", 5173)):
+                    if self._wait_port("127.0.0.1", port):
+                        webbrowser.open(f"http://localhost:{port}")
+                    else:
+                        self.print_warning(f"{name} is not responding on port {port}; not opening it")
                 self.print_success("Browser tabs opened!")
         except KeyboardInterrupt:
             print()
@@ -373,15 +589,21 @@ class SetupManager:
         self.print_info("Testing API endpoints...")
         
         try:
-            # Run the test script
-            venv_path = self.backend_path / "venv"
-            if self.platform == "windows":
-                python_exe = venv_path / "Scripts" / "python.exe"
-            else:
-                python_exe = venv_path / "bin" / "python"
+            if Path(sys.prefix).resolve() == (self.backend_path / "venv").resolve():
+                # Already running on the venv's interpreter, so run the tests here
+                # instead of starting another one
+                if str(self.backend_path) not in sys.path:
+                    sys.path.insert(0, str(self.backend_path))
+                api_tests = importlib.import_module("test_api")
+                if api_tests.run_all_tests():
+                    self.print_success("API tests completed successfully!")
+                    return True
+                self.print_error("API tests failed")
+                return False
             
+            # Run the test script
             success, stdout, stderr = self.run_command([
-                str(python_exe), "test_api.py"
+                str(self.venv_python), "test_api.py"
             ], cwd=self.backend_path)
             
             if success:
@@ -397,25 +619,53 @@ class SetupManager:
             self.print_error(f"Failed to run API tests: {e}")
             return False
 
+    def _run_step_graph(self, steps):
+        """
+        Run {name: (func, [dependency names])} setup steps; False if any fails
+        
+        Each step starts as soon as all of its dependencies have succeeded, so
+        independent chains of steps overlap. After a failure no new steps are
+        started, and the ones already running are allowed to finish.
+        """
+        done, running, failed = set(), {}, None
+        with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+            while failed is None and len(done) < len(steps):
+                for step_name, (step_func, deps) in steps.items():
+                    if (step_name not in done and step_name not in running.values()
+                            and all(dep in done for dep in deps)):
+                        self.print_info(f"Step: {step_name}")
+                        running[executor.submit(step_func)] = step_name
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step_name = running.pop(future)
+                    if future.result():
+                        done.add(step_name)
+                    elif failed is None:
+                        failed = step_name
+        
+        if failed is not None:
+            self.print_error(f"Setup failed at step: {failed}")
+            return False
+        print()
+        return True
+
     def complete_setup(self):
         """Run complete setup process"""
         self.print_info("Running complete setup process...")
         
-        steps = [
-            ("Checking Python installation", self.check_python),
-            ("Checking Node.js installation", self.check_node),
-            ("Checking npm installation", self.check_npm),
-            ("Creating virtual environment", self.create_venv),
-            ("Installing Python dependencies", self.install_python_deps),
-            ("Installing Node.js dependencies", self.install_node_deps),
-        ]
-        
-        for step_name, step_func in steps:
-            self.print_info(f"Step: {step_name}")
-            if not step_func():
-                self.print_error(f"Setup failed at step: {step_name}")
-                return False
-            print()
+        # The Python and Node.js chains don't depend on each other, so they
+        # run side by side; each install's output is labelled with its tool
+        steps = {
+            "Checking Python installation": (self.check_python, []),
+            "Checking Node.js installation": (self.check_node, []),
+            "Checking npm installation": (self.check_npm, ["Checking Node.js installation"]),
+            "Creating virtual environment": (self.create_venv, ["Checking Python installation"]),
+            "Installing Python dependencies": (self.install_python_deps, ["Creating virtual environment"]),
+            "Installing Node.js dependencies": (self.install_node_deps, ["Checking npm installation"]),
+        }
+        if not self._run_step_graph(steps):
+            return False
         
         self.print_success("Complete setup finished successfully!")
         self.print_info("You can now use other options to start frontend, backend, or test API")
@@ -475,15 +725,7 @@ Frontend:
         while True:
             self.print_banner()
             
-            menu = f"""
-{Colors.OKBLUE}{Colors.BOLD}Select Platform:{Colors.ENDC}
-{Colors.OKCYAN}1.{Colors.ENDC} Windows
-{Colors.OKCYAN}2.{Colors.ENDC} Linux
-{Colors.OKCYAN}3.{Colors.ENDC} Auto-detect ({self.platform.capitalize()})
-{Colors.OKCYAN}4.{Colors.ENDC} Exit
-
-Choose option (1-4): """
-
+            menu = MAIN_MENU_TEMPLATE.format_map({"platform": self.platform.capitalize()})
             choice = input(menu).strip()
             
             if choice == "1":
@@ -509,23 +751,7 @@ Choose option (1-4): """
             self.print_banner()
             self.print_info(f"Platform: {self.platform.capitalize()}")
             
-            menu = f"""
-{Colors.OKBLUE}{Colors.BOLD}Available Options:{Colors.ENDC}
-{Colors.OKCYAN}1.{Colors.ENDC} Start Frontend Development Server
-{Colors.OKCYAN}2.{Colors.ENDC} Start Backend API Server
-{Colors.OKCYAN}3.{Colors.ENDC} Run Both Frontend & Backend
-{Colors.OKCYAN}4.{Colors.ENDC} Test API Endpoints
-{Colors.OKCYAN}5.{Colors.ENDC} Complete Setup (Install Dependencies)
-{Colors.OKCYAN}6.{Colors.ENDC} Installation Guide
-{Colors.OKCYAN}7.{Colors.ENDC} Open Frontend in Browser
-{Colors.OKCYAN}8.{Colors.ENDC} Open Backend API in Browser
-{Colors.OKCYAN}9.{Colors.ENDC} Check System Requirements
-{Colors.OKCYAN}10.{Colors.ENDC} Back to Platform Selection
-{Colors.OKCYAN}0.{Colors.ENDC} Exit
-
-Choose option (0-10): """
-
-            choice = input(menu).strip()
+            choice = input(OPTIONS_MENU).strip()
             
             if choice == "1":
                 self.start_frontend()
@@ -562,31 +788,20 @@ Choose option (0-10): """
         self.print_info("Checking system requirements...")
         print()
         
-        # Check Python
-        python_ok = self.check_python()
-        
-        # Check Node.js
-        node_ok = self.check_node()
-        
-        # Check npm
-        npm_ok = self.check_npm()
-        
-        # Check Git
-        git_success, git_stdout, _ = self.run_command(["git", "--version"], shell=True)
-        if git_success:
-            self.print_success(f"Git found: {git_stdout.strip()}")
-        else:
-            self.print_warning("Git not found (optional but recommended)")
+        # Check Python, Node.js, npm and Git concurrently
+        python_ok, node_ok, npm_ok, _ = self.run_concurrently([
+            self.check_python, self.check_node, self.check_npm, self.check_git
+        ])
         
         # Check project structure
-        frontend_exists = self.frontend_path.exists()
-        backend_exists = self.backend_path.exists()
+        frontend_exists = self._exists(self.frontend_path)
+        backend_exists = self._exists(self.backend_path)
         
         if frontend_exists:
             self.print_success("Frontend directory found")
             # Check if node_modules exists
             node_modules = self.frontend_path / "node_modules"
-            if node_modules.exists():
+            if self._exists(node_modules):
                 self.print_success("Frontend dependencies installed")
             else:
                 self.print_warning("Frontend dependencies not installed (will install automatically)")
@@ -597,7 +812,7 @@ Choose option (0-10): """
             self.print_success("Backend directory found")
             # Check if venv exists
             venv_path = self.backend_path / "venv"
-            if venv_path.exists():
+            if self._exists(venv_path):
                 self.print_success("Python virtual environment found")
             else:
                 self.print_warning("Python virtual environment not found (will create automatically)")
@@ -617,6 +832,10 @@ Choose option (0-10): """
 
 def main():
     """Main entry point"""
+    # Flush each line even when redirected, so progress shows up as it happens
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=True)
+    
     try:
         manager = SetupManager()
         manager.show_main_menu()